@@ -0,0 +1,82 @@
+"""Normalized address
+
+Revision ID: 0c5d2f8a7b36
+Revises: f3b6c8d2e915
+Create Date: 2026-10-18 18:05:51.226093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0c5d2f8a7b36'
+down_revision = 'f3b6c8d2e915'
+branch_labels = None
+depends_on = None
+
+# USPS Publication 28 abbreviations: directionals, common street suffixes and ordinals.
+# Words already in their abbreviated form pass through unchanged.
+USPS_ABBREVIATIONS = [
+    ('NORTH', 'N'), ('SOUTH', 'S'), ('EAST', 'E'), ('WEST', 'W'),
+    ('NORTHEAST', 'NE'), ('NORTHWEST', 'NW'), ('SOUTHEAST', 'SE'), ('SOUTHWEST', 'SW'),
+    ('ALLEY', 'ALY'), ('AVENUE', 'AVE'), ('AV', 'AVE'), ('AVEN', 'AVE'), ('AVN', 'AVE'),
+    ('BOULEVARD', 'BLVD'), ('BOUL', 'BLVD'), ('BOULV', 'BLVD'), ('BRANCH', 'BR'), ('BRIDGE', 'BRG'),
+    ('BYPASS', 'BYP'), ('CIRCLE', 'CIR'), ('CIRC', 'CIR'), ('CIRCL', 'CIR'), ('CRCL', 'CIR'),
+    ('COURT', 'CT'), ('COVE', 'CV'), ('CREEK', 'CRK'), ('CRESCENT', 'CRES'), ('CROSSING', 'XING'),
+    ('DRIVE', 'DR'), ('DRIV', 'DR'), ('DRV', 'DR'), ('EXPRESSWAY', 'EXPY'), ('EXTENSION', 'EXT'),
+    ('FORT', 'FT'), ('FREEWAY', 'FWY'), ('GARDENS', 'GDNS'), ('GROVE', 'GRV'), ('HEIGHTS', 'HTS'),
+    ('HIGHWAY', 'HWY'), ('HIGHWY', 'HWY'), ('HILL', 'HL'), ('HOLLOW', 'HOLW'), ('JUNCTION', 'JCT'),
+    ('LANE', 'LN'), ('MANOR', 'MNR'), ('MEADOWS', 'MDWS'), ('MOUNT', 'MT'), ('MOUNTAIN', 'MTN'),
+    ('PARKWAY', 'PKWY'), ('PARKWY', 'PKWY'), ('PKY', 'PKWY'), ('PLACE', 'PL'), ('PLAZA', 'PLZ'),
+    ('POINT', 'PT'), ('RIDGE', 'RDG'), ('ROAD', 'RD'), ('ROUTE', 'RTE'), ('SQUARE', 'SQ'),
+    ('STREET', 'ST'), ('STRT', 'ST'), ('STR', 'ST'), ('TERRACE', 'TER'), ('TRACE', 'TRCE'),
+    ('TRAIL', 'TRL'), ('TURNPIKE', 'TPKE'), ('VIEW', 'VW'), ('VILLAGE', 'VLG'),
+    ('FIRST', '1ST'), ('SECOND', '2ND'), ('THIRD', '3RD'), ('FOURTH', '4TH'), ('FIFTH', '5TH'),
+    ('SIXTH', '6TH'), ('SEVENTH', '7TH'), ('EIGHTH', '8TH'), ('NINTH', '9TH'), ('TENTH', '10TH'),
+]
+
+# The street-level parts of an address, in the order they are written. Joined with || and
+# coalesce, which are immutable (concat_ws is only stable and can't back a generated
+# column); usps_normalize drops the empty words missing parts leave behind.
+ADDRESS_PARTS = " || ' ' || ".join(
+    f"coalesce({part}, '')"
+    for part in ('house_number', 'house_number_suffix', 'direction', 'street_name', 'street_type', 'post_direction')
+)
+
+
+def upgrade():
+    # Upper-cases, turns punctuation into spaces and abbreviates word by word. The
+    # mapping is inlined so the function is genuinely immutable and can back a
+    # generated column; search normalizes input through the same function.
+    values = ', '.join(f"('{word}', '{abbreviation}')" for word, abbreviation in USPS_ABBREVIATIONS)
+    op.execute(f"""
+    CREATE OR REPLACE FUNCTION electorate.usps_normalize(address text)
+    RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE
+    AS $$
+        SELECT string_agg(COALESCE(m.abbreviation, t.word), ' ' ORDER BY t.position)
+        FROM unnest(regexp_split_to_array(upper(regexp_replace(address, '[^A-Za-z0-9/]+', ' ', 'g')), ' '))
+            WITH ORDINALITY AS t(word, position)
+        LEFT JOIN (VALUES {values}) AS m(word, abbreviation) ON m.word = t.word
+        WHERE t.word <> ''
+    $$;
+    """)
+
+    # Computed by Postgres whenever any loader inserts an address; adding it backfills existing rows
+    op.execute(f"""
+    ALTER TABLE electorate.address
+    ADD COLUMN normalized_address text GENERATED ALWAYS AS (electorate.usps_normalize({ADDRESS_PARTS})) STORED;
+    """)
+    op.execute("COMMENT ON COLUMN electorate.address.normalized_address IS 'House number and street, USPS-normalized';")
+
+    # Equality and prefix lookups for free-text address search
+    op.execute("""
+    CREATE INDEX IF NOT EXISTS ix_electorate_address_normalized_address
+    ON electorate.address (normalized_address text_pattern_ops);
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS electorate.ix_electorate_address_normalized_address;")
+    op.execute("ALTER TABLE electorate.address DROP COLUMN IF EXISTS normalized_address;")
+    op.execute("DROP FUNCTION IF EXISTS electorate.usps_normalize(text);")
@@ -0,0 +1,36 @@
+"""Loader natural keys
+
+Revision ID: 1b7e4c2d9a30
+Revises: 692fc097b07f
+Create Date: 2026-10-18 09:12:41.530112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '1b7e4c2d9a30'
+down_revision = '692fc097b07f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Unique natural keys so the bulk loader can resolve rows with INSERT ... ON CONFLICT
+    op.execute("""
+    CREATE UNIQUE INDEX address_natural_key ON electorate.address (
+        house_number, house_number_suffix, street_name, street_type, direction,
+        post_direction, apt_num, city, state, zip
+    ) NULLS NOT DISTINCT;
+    """)
+
+    op.execute("""
+    CREATE UNIQUE INDEX locality_natural_key ON electorate.locality (
+        locality_code, locality_name, precinct_code, precinct_name
+    ) NULLS NOT DISTINCT;
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS electorate.locality_natural_key;")
+    op.execute("DROP INDEX IF EXISTS electorate.address_natural_key;")
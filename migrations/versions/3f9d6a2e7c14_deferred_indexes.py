@@ -0,0 +1,30 @@
+"""Deferred indexes
+
+Revision ID: 3f9d6a2e7c14
+Revises: 8e41d07b3f95
+Create Date: 2026-10-18 14:02:11.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '3f9d6a2e7c14'
+down_revision = '8e41d07b3f95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Secondary indexes dropped for a bulk load, kept until they are rebuilt
+    op.create_table('deferred_index',
+        sa.Column('index_name', sa.Text(), primary_key=True, comment='Schema-qualified index name'),
+        sa.Column('table_name', sa.Text(), nullable=False, comment='Schema-qualified table the index belongs to'),
+        sa.Column('definition', sa.Text(), nullable=False, comment='CREATE INDEX statement from pg_get_indexdef'),
+        sa.Column('deferred_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        schema='meta'
+    )
+
+
+def downgrade():
+    op.drop_table('deferred_index', schema='meta')
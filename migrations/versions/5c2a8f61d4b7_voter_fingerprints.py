@@ -0,0 +1,29 @@
+"""Voter fingerprints
+
+Revision ID: 5c2a8f61d4b7
+Revises: 1b7e4c2d9a30
+Create Date: 2026-10-18 11:03:27.184906
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '5c2a8f61d4b7'
+down_revision = '1b7e4c2d9a30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Per-voter hash of the last applied source row, used by delta refreshes
+    op.create_table('voter_fingerprint',
+        sa.Column('identification_number', sa.String(length=50), primary_key=True, comment="Voter's unique identification number"),
+        sa.Column('fingerprint', sa.String(length=32), nullable=False, comment="md5 of the voter's last applied source row"),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        schema='meta'
+    )
+
+
+def downgrade():
+    op.drop_table('voter_fingerprint', schema='meta')
@@ -0,0 +1,71 @@
+"""Collected sheet row unique
+
+Revision ID: 6d3a9f2b8e40
+Revises: 0c5d2f8a7b36
+Create Date: 2026-10-18 18:41:27.503816
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '6d3a9f2b8e40'
+down_revision = '0c5d2f8a7b36'
+branch_labels = None
+depends_on = None
+
+# signatures.collected as it was before this revision
+COLLECTED_COLUMNS = (
+    "id, sheet_id, row_id, voter_id, first_name, last_name, full_street_address, apt, city, "
+    "state, zip, last_4, status, date_collected, created_at, updated_at"
+)
+
+
+def upgrade():
+    # Double-submits left repeated rows, possibly different voters typed on the same
+    # row number. The most recent entry for a sheet row stays; the others are kept
+    # here for manual review and are put back on downgrade.
+    op.execute("""
+    CREATE TABLE signatures.collected_duplicates_removed (
+        LIKE signatures.collected INCLUDING DEFAULTS,
+        kept_id integer NOT NULL,
+        removed_at timestamp with time zone NOT NULL DEFAULT now()
+    );
+    COMMENT ON TABLE signatures.collected_duplicates_removed IS
+        'Rows removed from signatures.collected when (sheet_id, row_id) became unique; kept_id is the entry that stayed';
+    """)
+    op.execute("""
+    WITH ranked AS (
+        SELECT id, max(id) OVER (PARTITION BY sheet_id, row_id) AS kept_id
+        FROM signatures.collected
+    )
+    INSERT INTO signatures.collected_duplicates_removed
+    SELECT c.*, r.kept_id, now()
+    FROM signatures.collected c
+    JOIN ranked r ON r.id = c.id
+    WHERE r.id <> r.kept_id;
+    """)
+    op.execute("""
+    DELETE FROM signatures.collected c
+    USING signatures.collected_duplicates_removed d
+    WHERE d.id = c.id;
+    """)
+
+    # One signature per sheet row; entries are upserted on it
+    op.create_unique_constraint('collected_sheet_row_unique', 'collected', ['sheet_id', 'row_id'], schema='signatures')
+
+    op.add_column('collected',
+        sa.Column('idempotency_key', sa.String(length=64), nullable=True, comment='Client key of the submission that last wrote the row; replays with it are no-ops'),
+        schema='signatures'
+    )
+
+
+def downgrade():
+    op.drop_constraint('collected_sheet_row_unique', 'collected', schema='signatures')
+    op.drop_column('collected', 'idempotency_key', schema='signatures')
+    op.execute(f"""
+    INSERT INTO signatures.collected ({COLLECTED_COLUMNS})
+    SELECT {COLLECTED_COLUMNS}
+    FROM signatures.collected_duplicates_removed;
+    """)
+    op.execute("DROP TABLE IF EXISTS signatures.collected_duplicates_removed;")
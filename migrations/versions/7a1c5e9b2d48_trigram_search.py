@@ -0,0 +1,46 @@
+"""Trigram search
+
+Revision ID: 7a1c5e9b2d48
+Revises: 3f9d6a2e7c14
+Create Date: 2026-10-18 14:41:37.206519
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '7a1c5e9b2d48'
+down_revision = '3f9d6a2e7c14'
+branch_labels = None
+depends_on = None
+
+# (table, column) pairs searched with user wildcards
+SEARCH_COLUMNS = [
+    ('voters', 'first_name'),
+    ('voters', 'last_name'),
+    ('address', 'street_name'),
+    ('address', 'city'),
+]
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+
+    for table, column in SEARCH_COLUMNS:
+        # Trigram GIN index for patterns with a leading or inner wildcard (ILIKE '%son')
+        op.execute(f"""
+        CREATE INDEX IF NOT EXISTS ix_electorate_{table}_{column}_trgm
+        ON electorate.{table} USING gin ({column} gin_trgm_ops);
+        """)
+
+        # Lower-cased btree for exact and prefix patterns (lower(col) LIKE 'smi%')
+        op.execute(f"""
+        CREATE INDEX IF NOT EXISTS ix_electorate_{table}_{column}_lower
+        ON electorate.{table} (lower({column}) text_pattern_ops);
+        """)
+
+
+def downgrade():
+    for table, column in reversed(SEARCH_COLUMNS):
+        op.execute(f"DROP INDEX IF EXISTS electorate.ix_electorate_{table}_{column}_lower;")
+        op.execute(f"DROP INDEX IF EXISTS electorate.ix_electorate_{table}_{column}_trgm;")
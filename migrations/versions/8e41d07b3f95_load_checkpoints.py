@@ -0,0 +1,45 @@
+"""Load checkpoints
+
+Revision ID: 8e41d07b3f95
+Revises: 5c2a8f61d4b7
+Create Date: 2026-10-18 13:26:50.402317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8e41d07b3f95'
+down_revision = '5c2a8f61d4b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # One row per voter file load
+    op.create_table('load_run',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('file_path', sa.Text(), nullable=False, comment='Voter file being loaded'),
+        sa.Column('mode', sa.String(length=15), nullable=False, comment='Loader mode'),
+        sa.Column('status', sa.String(length=15), nullable=False, comment='Running, Complete or Failed'),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        schema='meta'
+    )
+
+    # One row per committed batch, written in the batch's transaction
+    op.create_table('load_checkpoint',
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('batch_id', sa.Integer(), nullable=False, comment='Sequence of the committed batch within the run'),
+        sa.Column('row_number', sa.BigInteger(), nullable=False, comment='Last source row included in the batch'),
+        sa.Column('byte_offset', sa.BigInteger(), nullable=False, comment='Source byte offset just past the batch'),
+        sa.Column('committed_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('run_id', 'batch_id'),
+        sa.ForeignKeyConstraint(['run_id'], ['meta.load_run.id'], name='load_checkpoint_run_fk', ondelete='CASCADE'),
+        schema='meta'
+    )
+
+
+def downgrade():
+    op.drop_table('load_checkpoint', schema='meta')
+    op.drop_table('load_run', schema='meta')
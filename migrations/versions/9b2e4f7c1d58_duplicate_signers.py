@@ -0,0 +1,29 @@
+"""Duplicate signers
+
+Revision ID: 9b2e4f7c1d58
+Revises: 6d3a9f2b8e40
+Create Date: 2026-10-18 19:02:44.318650
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '9b2e4f7c1d58'
+down_revision = '6d3a9f2b8e40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Each new signature is checked against the voter's other signatures, and the
+    # duplicate report groups by voter, without scanning signatures.collected
+    op.execute("""
+    CREATE INDEX IF NOT EXISTS ix_signatures_collected_voter_id
+    ON signatures.collected (voter_id)
+    WHERE voter_id IS NOT NULL;
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS signatures.ix_signatures_collected_voter_id;")
@@ -0,0 +1,101 @@
+"""Collected counts
+
+Revision ID: a8c3e6f0b274
+Revises: 9b2e4f7c1d58
+Create Date: 2026-10-18 19:26:13.905172
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a8c3e6f0b274'
+down_revision = '9b2e4f7c1d58'
+branch_labels = None
+depends_on = None
+
+# The counters each signature row contributes to, for a row aliased `r`
+COUNTER_SCOPES = "LATERAL (VALUES ('total', ''), ('sheet', r.sheet_id::text), ('day', r.date_collected::text)) AS s(scope, scope_key)"
+
+
+def upgrade():
+    # Signature counts per status, overall, per sheet and per collection day
+    op.create_table('collected_count',
+        sa.Column('scope', sa.String(length=10), primary_key=True, comment='total, sheet or day'),
+        sa.Column('scope_key', sa.String(length=20), primary_key=True, comment="Sheet id or collection date; '' for total"),
+        sa.Column('status', sa.String(length=50), primary_key=True),
+        sa.Column('count', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        schema='signatures'
+    )
+
+    # Statement-level, so a bulk insert adjusts each counter once. Each event runs a
+    # single INSERT, grouped and ordered once by counter key; on UPDATE (upserts move
+    # rows between keys) removed rows count -1 and added rows +1 in that same pass,
+    # so concurrent writers lock counters in the same order and can't deadlock on them.
+    adjust = f"""
+            INSERT INTO signatures.collected_count AS c (scope, scope_key, status, count)
+            SELECT s.scope, s.scope_key, r.status, sum(r.delta)
+            FROM ({{rows}}) r CROSS JOIN {COUNTER_SCOPES}
+            GROUP BY s.scope, s.scope_key, r.status
+            HAVING sum(r.delta) <> 0
+            ORDER BY s.scope, s.scope_key, r.status
+            ON CONFLICT (scope, scope_key, status)
+            DO UPDATE SET count = c.count + EXCLUDED.count, updated_at = now();"""
+    removed = "SELECT sheet_id, date_collected, status, -1 AS delta FROM old_rows"
+    added = "SELECT sheet_id, date_collected, status, 1 AS delta FROM new_rows"
+    op.execute(f"""
+    CREATE OR REPLACE FUNCTION signatures.count_collected()
+    RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN{adjust.format(rows=added)}
+        ELSIF TG_OP = 'DELETE' THEN{adjust.format(rows=removed)}
+        ELSE{adjust.format(rows=f"{removed} UNION ALL {added}")}
+        END IF;
+        RETURN NULL;
+    END;
+    $$;
+    """)
+
+    # Transition tables allow one event per trigger
+    op.execute("""
+    CREATE TRIGGER count_collected_insert
+    AFTER INSERT ON signatures.collected
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION signatures.count_collected();
+    """)
+
+    op.execute("""
+    CREATE TRIGGER count_collected_update
+    AFTER UPDATE ON signatures.collected
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION signatures.count_collected();
+    """)
+
+    op.execute("""
+    CREATE TRIGGER count_collected_delete
+    AFTER DELETE ON signatures.collected
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION signatures.count_collected();
+    """)
+
+    # Counts for the signatures already collected
+    op.execute(f"""
+    INSERT INTO signatures.collected_count (scope, scope_key, status, count)
+    SELECT s.scope, s.scope_key, r.status, count(*)
+    FROM signatures.collected r CROSS JOIN {COUNTER_SCOPES}
+    GROUP BY s.scope, s.scope_key, r.status;
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS count_collected_delete ON signatures.collected;")
+    op.execute("DROP TRIGGER IF EXISTS count_collected_update ON signatures.collected;")
+    op.execute("DROP TRIGGER IF EXISTS count_collected_insert ON signatures.collected;")
+    op.execute("DROP FUNCTION IF EXISTS signatures.count_collected();")
+    op.drop_table('collected_count', schema='signatures')
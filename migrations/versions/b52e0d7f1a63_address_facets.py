@@ -0,0 +1,51 @@
+"""Address facets
+
+Revision ID: b52e0d7f1a63
+Revises: 7a1c5e9b2d48
+Create Date: 2026-10-18 15:20:04.871136
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b52e0d7f1a63'
+down_revision = '7a1c5e9b2d48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Single row, bumped every time the loader finishes, so caches know the data changed
+    op.create_table('data_version',
+        sa.Column('id', sa.Integer(), primary_key=True, comment='Always 1'),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0', comment='Incremented after every voter file load'),
+        sa.Column('loaded_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.CheckConstraint('id = 1', name='data_version_single_row'),
+        schema='meta'
+    )
+    op.execute("INSERT INTO meta.data_version (id, version) VALUES (1, 0);")
+
+    # Precomputed address facet counts for the search form
+    op.create_table('address_facet',
+        sa.Column('facet', sa.String(length=20), nullable=False, comment='direction, post_direction, street_type or state'),
+        sa.Column('value', sa.Text(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False, comment='Addresses with this value'),
+        sa.PrimaryKeyConstraint('facet', 'value'),
+        schema='meta'
+    )
+    op.execute("""
+    INSERT INTO meta.address_facet (facet, value, count)
+    SELECT 'direction', direction, count(*) FROM electorate.address WHERE direction IS NOT NULL GROUP BY direction
+    UNION ALL
+    SELECT 'post_direction', post_direction, count(*) FROM electorate.address WHERE post_direction IS NOT NULL GROUP BY post_direction
+    UNION ALL
+    SELECT 'street_type', street_type, count(*) FROM electorate.address WHERE street_type IS NOT NULL GROUP BY street_type
+    UNION ALL
+    SELECT 'state', state, count(*) FROM electorate.address WHERE state IS NOT NULL GROUP BY state;
+    """)
+
+
+def downgrade():
+    op.drop_table('address_facet', schema='meta')
+    op.drop_table('data_version', schema='meta')
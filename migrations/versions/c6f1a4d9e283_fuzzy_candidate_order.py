@@ -0,0 +1,36 @@
+"""Fuzzy candidate order
+
+Revision ID: c6f1a4d9e283
+Revises: a8c3e6f0b274
+Create Date: 2026-10-18 20:14:52.640117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c6f1a4d9e283'
+down_revision = 'a8c3e6f0b274'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Fuzzy search takes the closest last names by trigram distance (last_name <-> 'smyth');
+    # GIN can't order by distance, GiST can
+    op.execute("""
+    CREATE INDEX IF NOT EXISTS ix_electorate_voters_last_name_trgm_gist
+    ON electorate.voters USING gist (last_name gist_trgm_ops);
+    """)
+
+    # The phonetic lookup reads a metaphone key in identification number order, so a
+    # common key (SMITH, SMYTHE, ...) stops at the candidate limit instead of being sorted
+    op.execute("""
+    CREATE INDEX IF NOT EXISTS ix_electorate_voters_last_name_dmetaphone_id
+    ON electorate.voters (dmetaphone(last_name), identification_number);
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS electorate.ix_electorate_voters_last_name_dmetaphone_id;")
+    op.execute("DROP INDEX IF EXISTS electorate.ix_electorate_voters_last_name_trgm_gist;")
@@ -0,0 +1,27 @@
+"""Voter search order
+
+Revision ID: d4a8e3c61f27
+Revises: b52e0d7f1a63
+Create Date: 2026-10-18 15:58:22.310457
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd4a8e3c61f27'
+down_revision = 'b52e0d7f1a63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves search's keyset pagination: ORDER BY and (last, first, id) > (...) on the same index
+    op.execute("""
+    CREATE INDEX IF NOT EXISTS ix_electorate_voters_search_order
+    ON electorate.voters (last_name, first_name, identification_number);
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS electorate.ix_electorate_voters_search_order;")
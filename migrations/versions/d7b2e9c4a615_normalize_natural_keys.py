@@ -0,0 +1,124 @@
+"""Normalize natural keys
+
+Revision ID: d7b2e9c4a615
+Revises: c6f1a4d9e283
+Create Date: 2026-10-18 20:47:36.182954
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd7b2e9c4a615'
+down_revision = 'c6f1a4d9e283'
+branch_labels = None
+depends_on = None
+
+# Columns the loader trims and upper-cases (so_well.utils.normalize.TEXT_FIELDS)
+ADDRESS_KEY_COLUMNS = (
+    'house_number', 'house_number_suffix', 'street_name', 'street_type', 'direction',
+    'post_direction', 'apt_num', 'city', 'state', 'zip'
+)
+VOTER_NAME_COLUMNS = ('last_name', 'first_name', 'middle_name', 'suffix')
+
+# electorate.address without the generated normalized_address
+ADDRESS_COLUMNS = "id, " + ", ".join(ADDRESS_KEY_COLUMNS) + ", full_address_searchable, created_at, updated_at"
+
+# The SQL twin of clean_text: surrounding whitespace trimmed, upper-cased
+CLEAN = "upper(btrim({column}, E' \\t\\r\\n'))"
+
+
+def cleaned(columns):
+    return ', '.join(CLEAN.format(column=column) for column in columns)
+
+def assign(columns, source):
+    return ', '.join(f'{column} = {source.format(column=column)}' for column in columns)
+
+def upgrade():
+    # Rows loaded before normalization kept their original case and spacing, so the
+    # next load would insert a second copy of every such address. Addresses that
+    # only differ that way are merged onto the lowest id first.
+    op.execute(f"""
+    CREATE TEMP TABLE address_merge ON COMMIT DROP AS
+    SELECT id, min(id) OVER (PARTITION BY {cleaned(ADDRESS_KEY_COLUMNS)}) AS keep_id
+    FROM electorate.address;
+    CREATE UNIQUE INDEX ON address_merge (id);
+    """)
+
+    # Every address merged away or respelled and every voter renamed or moved to the
+    # kept address, as they were, so downgrade can put them back
+    op.execute(f"""
+    CREATE TABLE electorate.address_before_normalize AS
+    SELECT {ADDRESS_COLUMNS}, m.keep_id AS kept_id
+    FROM electorate.address a
+    JOIN address_merge m USING (id)
+    WHERE m.id <> m.keep_id
+        OR ({', '.join(ADDRESS_KEY_COLUMNS)}) IS DISTINCT FROM ({cleaned(ADDRESS_KEY_COLUMNS)});
+    COMMENT ON TABLE electorate.address_before_normalize IS
+        'Addresses as they were before natural keys were normalized; kept_id is the address that stayed';
+    """)
+    op.execute(f"""
+    CREATE TABLE electorate.voters_before_normalize AS
+    SELECT v.identification_number, {', '.join(VOTER_NAME_COLUMNS)}, v.residence_address_id, v.mailing_address_id
+    FROM electorate.voters v
+    WHERE ({', '.join(VOTER_NAME_COLUMNS)}) IS DISTINCT FROM ({cleaned(VOTER_NAME_COLUMNS)})
+        OR EXISTS (
+            SELECT 1 FROM address_merge m
+            WHERE m.id <> m.keep_id AND m.id IN (v.residence_address_id, v.mailing_address_id)
+        );
+    COMMENT ON TABLE electorate.voters_before_normalize IS
+        'Voter names and address ids as they were before natural keys were normalized';
+    """)
+
+    op.execute("DELETE FROM address_merge WHERE id = keep_id;")
+    op.execute("""
+    UPDATE electorate.voters v SET residence_address_id = m.keep_id
+    FROM address_merge m WHERE v.residence_address_id = m.id;
+    """)
+    op.execute("""
+    UPDATE electorate.voters v SET mailing_address_id = m.keep_id
+    FROM address_merge m WHERE v.mailing_address_id = m.id;
+    """)
+    op.execute("""
+    DELETE FROM electorate.address a
+    USING address_merge m WHERE a.id = m.id;
+    """)
+
+    for table, columns in (('address', ADDRESS_KEY_COLUMNS), ('voters', VOTER_NAME_COLUMNS)):
+        op.execute(f"""
+        UPDATE electorate.{table} SET {assign(columns, CLEAN)}
+        WHERE ({', '.join(columns)}) IS DISTINCT FROM ({cleaned(columns)});
+        """)
+
+    # Delta fingerprints of voters loaded before normalization were taken over the raw
+    # values, so the next delta sees those voters as changed and rewrites them once.
+
+    op.execute("REFRESH MATERIALIZED VIEW electorate.voter_lookup;")
+    op.execute("UPDATE meta.data_version SET version = version + 1, loaded_at = now() WHERE id = 1;")
+
+
+def downgrade():
+    # Kept addresses get their original spelling back before the merged ones return,
+    # then voters point at the addresses they had
+    op.execute(f"""
+    UPDATE electorate.address a SET {assign(ADDRESS_KEY_COLUMNS, 'r.{column}')}
+    FROM electorate.address_before_normalize r
+    WHERE r.id = a.id;
+    """)
+    op.execute(f"""
+    INSERT INTO electorate.address ({ADDRESS_COLUMNS})
+    SELECT {ADDRESS_COLUMNS}
+    FROM electorate.address_before_normalize
+    WHERE id <> kept_id;
+    """)
+    op.execute(f"""
+    UPDATE electorate.voters v SET
+        {assign(VOTER_NAME_COLUMNS + ('residence_address_id', 'mailing_address_id'), 'r.{column}')}
+    FROM electorate.voters_before_normalize r
+    WHERE r.identification_number = v.identification_number;
+    """)
+    op.execute("DROP TABLE IF EXISTS electorate.voters_before_normalize;")
+    op.execute("DROP TABLE IF EXISTS electorate.address_before_normalize;")
+
+    op.execute("REFRESH MATERIALIZED VIEW electorate.voter_lookup;")
+    op.execute("UPDATE meta.data_version SET version = version + 1, loaded_at = now() WHERE id = 1;")
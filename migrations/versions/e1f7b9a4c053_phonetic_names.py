@@ -0,0 +1,29 @@
+"""Phonetic names
+
+Revision ID: e1f7b9a4c053
+Revises: d4a8e3c61f27
+Create Date: 2026-10-18 16:34:48.902215
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e1f7b9a4c053'
+down_revision = 'd4a8e3c61f27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS fuzzystrmatch;")
+
+    # Double Metaphone keys of last and first name, precomputed in the index for fuzzy search
+    op.execute("""
+    CREATE INDEX IF NOT EXISTS ix_electorate_voters_name_dmetaphone
+    ON electorate.voters (dmetaphone(last_name), dmetaphone(first_name));
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS electorate.ix_electorate_voters_name_dmetaphone;")
@@ -0,0 +1,43 @@
+"""Lookup refresh
+
+Revision ID: f3b6c8d2e915
+Revises: e1f7b9a4c053
+Create Date: 2026-10-18 17:12:09.774528
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f3b6c8d2e915'
+down_revision = 'e1f7b9a4c053'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # REFRESH MATERIALIZED VIEW CONCURRENTLY needs a unique index on the view
+    op.execute("""
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_voter_mview_identification_number
+    ON electorate.voter_lookup (identification_number);
+    """)
+
+    # One row per refresh request; pending requests are coalesced into the next refresh
+    op.create_table('lookup_refresh',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('reason', sa.String(length=50), nullable=False, comment='load, schedule or manual'),
+        sa.Column('status', sa.String(length=15), nullable=False, comment='Pending, Running, Complete or Failed'),
+        sa.Column('requested_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True, comment='voter_lookup reflects the tables as of started_at'),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        schema='meta'
+    )
+    op.create_index('ix_meta_lookup_refresh_status', 'lookup_refresh', ['status'], schema='meta')
+
+
+def downgrade():
+    op.drop_index('ix_meta_lookup_refresh_status', table_name='lookup_refresh', schema='meta')
+    op.drop_table('lookup_refresh', schema='meta')
+    op.execute("DROP INDEX IF EXISTS electorate.idx_voter_mview_identification_number;")
@@ -2,6 +2,7 @@
 import os
 from flask import Flask, g
 from .utils import configure_logger, logger, loader
+from .utils.instrument import instrument_engine
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from .models import db, migrate
@@ -59,11 +60,19 @@ def begin_era():
     from .batches.routes import batches_bp
     app.register_blueprint(batches_bp)
 
+    # Admin Blueprint
+    from .admin.routes import admin_bp
+    app.register_blueprint(admin_bp)
+
 
     # Initialize database and migration
     db.init_app(app)
     migrate.init_app(app, db)
 
+    # Time queries made during requests and capture slow ones for /admin/queries
+    with app.app_context():
+        instrument_engine(db.engine)
+
     # Apply the middleware based on ZERO_TRUST environment variable
     zero_trust = os.getenv('ZERO_TRUST', 'false').lower() == 'true'
     if zero_trust:
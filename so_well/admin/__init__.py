@@ -0,0 +1 @@
+# so_well/admin/__init__.py
@@ -0,0 +1,17 @@
+# so_well/admin/routes.py
+from flask import Blueprint, jsonify
+from ..utils import logger
+from ..utils.instrument import query_log
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
+
+@admin_bp.route('/queries', methods=['GET'])
+def get_queries():
+    """Per-endpoint query timings and the most recent slow queries with their plans."""
+    return jsonify(query_log.snapshot())
+
+@admin_bp.route('/queries', methods=['DELETE'])
+def clear_queries():
+    query_log.clear()
+    logger.info("Cleared query instrumentation log")
+    return jsonify({"message": "Query log cleared"})
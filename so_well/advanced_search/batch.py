@@ -0,0 +1,79 @@
+# so_well/advanced_search/batch.py
+from sqlalchemy import text
+from ..models import db
+
+MAX_BATCH_SPECS = 50  # Search specs per request; a sheet has 12 rows
+DEFAULT_CANDIDATES = 10  # Candidates returned per spec
+MAX_CANDIDATES = 40
+
+# Spec field, as sent in the request -> array parameter it is unnested from
+SPEC_FIELDS = {
+    'last_name': 'last_names',
+    'first_name': 'first_names',
+    'middle_name': 'middle_names',
+    'house_number': 'house_numbers',
+    'street_name': 'street_names',
+    'city': 'cities',
+    'zip_code': 'zip_codes',
+}
+
+# One statement for the whole batch: the specs arrive as parallel arrays, are unnested
+# into rows and each is matched with a LATERAL subquery. last_name is required so
+# every spec is driven by ix_electorate_voters_last_name_trgm, which can take the
+# pattern from the outer row at execution time.
+BATCH_LOOKUP_SQL = text("""
+    SELECT
+        s.row_id, m.identification_number, m.first_name, m.middle_name, m.last_name, m.suffix,
+        m.status, m.house_number, m.house_number_suffix, m.direction, m.street_name,
+        m.street_type, m.post_direction, m.apt_num, m.city, m.state, m.zip
+    FROM unnest(
+        CAST(:row_ids AS int[]), CAST(:last_names AS text[]), CAST(:first_names AS text[]),
+        CAST(:middle_names AS text[]), CAST(:house_numbers AS text[]), CAST(:street_names AS text[]),
+        CAST(:cities AS text[]), CAST(:zip_codes AS text[])
+    ) AS s(row_id, last_name, first_name, middle_name, house_number, street_name, city, zip_code)
+    CROSS JOIN LATERAL (
+        SELECT
+            v.identification_number, v.first_name, v.middle_name, v.last_name, v.suffix, v.status,
+            a.house_number, a.house_number_suffix, a.direction, a.street_name, a.street_type,
+            a.post_direction, a.apt_num, a.city, a.state, a.zip
+        FROM electorate.voters v
+        JOIN electorate.address a ON a.id = v.residence_address_id
+        WHERE v.last_name ILIKE s.last_name
+            AND (s.first_name IS NULL OR v.first_name ILIKE s.first_name)
+            AND (s.middle_name IS NULL OR v.middle_name ILIKE s.middle_name)
+            AND (s.house_number IS NULL OR a.house_number ILIKE s.house_number)
+            AND (s.street_name IS NULL OR a.street_name ILIKE s.street_name)
+            AND (s.city IS NULL OR a.city ILIKE s.city)
+            AND (s.zip_code IS NULL OR a.zip LIKE s.zip_code || '%')
+        ORDER BY v.last_name, v.first_name, v.identification_number
+        LIMIT :candidates
+    ) m
+    ORDER BY s.row_id, m.last_name, m.first_name, m.identification_number;
+""")
+
+
+def batch_lookup(specs, candidates, wildcard_to_sql):
+    """
+    Resolves every search spec in one round-trip. `specs` are (row_id, spec dict)
+    pairs with a last_name each. Returns {row_id: [candidate rows]}.
+    """
+    params = {
+        'row_ids': [row_id for row_id, _ in specs],
+        'candidates': candidates
+    }
+    for field, param in SPEC_FIELDS.items():
+        values = []
+        for _, spec in specs:
+            value = (spec.get(field) or '').strip()
+            if not value:
+                values.append(None)
+            elif field == 'zip_code':
+                values.append(value[:5])
+            else:
+                values.append(wildcard_to_sql(value))
+        params[param] = values
+
+    matches = {row_id: [] for row_id, _ in specs}
+    for row in db.session.execute(BATCH_LOOKUP_SQL, params):
+        matches[row.row_id].append(row)
+    return matches
@@ -0,0 +1,95 @@
+# so_well/advanced_search/cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+
+SEARCH_CACHE_SIZE = 1024  # Responses kept per process, least recently used evicted first
+SEARCH_CACHE_TTL = 300  # Seconds a response stays valid
+
+# Compared case-insensitively by every search mode, so they are lower-cased in the key
+CASE_INSENSITIVE_FIELDS = (
+    'first_name', 'middle_name', 'last_name', 'house_number', 'house_number_suffix',
+    'street_name', 'apartment_number', 'city', 'zip_code', 'address'
+)
+
+
+def normalize_filters(data):
+    """
+    The search request reduced to what changes its result: values trimmed, empty
+    fields dropped, list filters sorted and case-insensitive fields lower-cased.
+    """
+    normalized = {}
+    for field, value in data.items():
+        if isinstance(value, str):
+            value = value.strip()
+            if field in CASE_INSENSITIVE_FIELDS:
+                value = value.lower()
+        elif isinstance(value, list):
+            value = sorted(str(item).strip() for item in value if str(item).strip())
+        if value in ('', [], None, False):
+            continue
+        normalized[field] = value
+    return normalized
+
+class SearchCache:
+    """
+    Bounded LRU of search responses keyed by the normalized filters. Entries expire
+    after `ttl` seconds and are all dropped when the voter data version changes.
+    """
+
+    def __init__(self, max_size=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def key(self, data):
+        return json.dumps(normalize_filters(data), sort_keys=True, default=str)
+
+    def get(self, key, version):
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.version = version
+
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, response):
+        with self.lock:
+            if version != self.version:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl,
+                'data_version': self.version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+search_cache = SearchCache()
@@ -0,0 +1,84 @@
+# so_well/advanced_search/fuzzy.py
+from sqlalchemy import Integer, cast, func, or_, select, union
+from ..models import db, Voter, Address
+
+CANDIDATE_LIMIT = 500  # Rows each index lookup may contribute before scoring
+
+# Combined score weights, summing to 1
+LAST_NAME_WEIGHT = 0.45
+FIRST_NAME_WEIGHT = 0.25
+LAST_NAME_PHONETIC_WEIGHT = 0.15
+FIRST_NAME_PHONETIC_WEIGHT = 0.05
+ADDRESS_WEIGHT = 0.10
+
+
+def fuzzy_candidates(last_name, first_name=None, state=None):
+    """
+    Voters worth scoring, found through indexes only, each lookup in an order its
+    index serves so it stops after CANDIDATE_LIMIT rows instead of sorting every match:
+    the same last name Double Metaphone key by identification number
+    (ix_electorate_voters_last_name_dmetaphone_id), and the closest last names by
+    trigram distance (`<->`, ix_electorate_voters_last_name_trgm_gist). Both apply
+    the first name and state constraints; first name closeness only counts in the score.
+    """
+    def candidates(condition, *order):
+        query = select(Voter.identification_number).where(condition)
+        if first_name:
+            query = query.where(or_(
+                func.dmetaphone(Voter.first_name) == func.dmetaphone(first_name),
+                Voter.first_name.op('%')(first_name)
+            ))
+        if state:
+            query = query.join(Address, Address.id == Voter.residence_address_id).where(Address.state == state)
+        return query.order_by(*order).limit(CANDIDATE_LIMIT)
+
+    phonetic = candidates(
+        func.dmetaphone(Voter.last_name) == func.dmetaphone(last_name),
+        Voter.identification_number
+    )
+    similar = candidates(
+        Voter.last_name.op('%')(last_name),
+        Voter.last_name.op('<->')(last_name), Voter.identification_number
+    )
+
+    return union(phonetic, similar).subquery('candidates')
+
+def fuzzy_score(last_name, first_name=None, address=None):
+    """Weighted trigram and phonetic similarity between a voter and what was typed, from 0 to 1."""
+    score = (
+        LAST_NAME_WEIGHT * func.similarity(Voter.last_name, last_name)
+        + LAST_NAME_PHONETIC_WEIGHT * cast(func.dmetaphone(Voter.last_name) == func.dmetaphone(last_name), Integer)
+    )
+    if first_name:
+        score = (
+            score
+            + FIRST_NAME_WEIGHT * func.similarity(Voter.first_name, first_name)
+            + FIRST_NAME_PHONETIC_WEIGHT * cast(func.dmetaphone(Voter.first_name) == func.dmetaphone(first_name), Integer)
+        )
+    if address:
+        score = score + ADDRESS_WEIGHT * func.similarity(
+            func.concat_ws(' ', Address.house_number, Address.street_name), address
+        )
+    return score
+
+def fuzzy_query(data, limit):
+    """
+    Top `limit` voters for a possibly misspelled name (and address), best combined
+    score first. Returns a query of (Voter, Address, score).
+    """
+    last_name = data['last_name'].strip()
+    first_name = (data.get('first_name') or '').strip() or None
+    address = ' '.join(
+        (data.get(field) or '').strip() for field in ('house_number', 'street_name')
+    ).strip() or None
+
+    candidates = fuzzy_candidates(last_name, first_name, data.get('state') or None)
+    score = fuzzy_score(last_name, first_name, address).label('score')
+
+    query = (db.session.query(Voter, Address, score)
+             .join(candidates, candidates.c.identification_number == Voter.identification_number)
+             .join(Address, Address.id == Voter.residence_address_id))
+    if data.get('state'):
+        query = query.filter(Address.state == data['state'])
+
+    return query.order_by(score.desc(), Voter.identification_number).limit(limit)
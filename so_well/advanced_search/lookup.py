@@ -0,0 +1,66 @@
+# so_well/advanced_search/lookup.py
+import re
+from sqlalchemy import column, func, table
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from .planner import TRIGRAM, pattern_shape
+
+# electorate.voter_lookup (migration c70e2c681e18); not a model so migrations leave it alone
+voter_lookup = table(
+    'voter_lookup',
+    column('identification_number'),
+    column('full_name_searchable', TSVECTOR),
+    column('address_searchable', TSVECTOR),
+    column('city_searchable', TSVECTOR),
+    column('zip_searchable', TSVECTOR),
+    schema='electorate'
+)
+
+# Form field -> (tsvector column, text search config); fields sharing a vector are combined
+FTS_FIELDS = {
+    'first_name': ('full_name_searchable', 'english'),
+    'middle_name': ('full_name_searchable', 'english'),
+    'house_number': ('address_searchable', 'english'),
+    'house_number_suffix': ('address_searchable', 'english'),
+    'street_name': ('address_searchable', 'english'),
+    'apartment_number': ('address_searchable', 'english'),
+    'city': ('city_searchable', 'english'),
+    'zip_code': ('zip_searchable', 'simple'),
+}
+
+TERM = re.compile(r'[A-Za-z0-9]+')
+
+
+def prefix_terms(value):
+    """Splits a form value into to_tsquery prefix terms: 'Walter Reed*' -> ['walter:*', 'reed:*']."""
+    return [f"{term.lower()}:*" for term in TERM.findall(value or '')]
+
+def needs_pattern_search(data, wildcard_to_sql):
+    """
+    True when a full-text field holds a leading or inner wildcard ('*son'). Prefix
+    tsqueries can't express those, so the search falls back to the ILIKE path.
+    """
+    return any(
+        data.get(field) and pattern_shape(wildcard_to_sql(data[field])) == TRIGRAM
+        for field in FTS_FIELDS
+    )
+
+def fts_conditions(data):
+    """
+    Builds the full-text part of a search from the form fields: one prefix tsquery
+    per voter_lookup vector, ANDing every term typed into the fields that share it.
+    Returns (filters, rank) where rank sums ts_rank over the matched vectors.
+    """
+    terms = {}
+    for field, (vector, config) in FTS_FIELDS.items():
+        for term in prefix_terms(data.get(field)):
+            terms.setdefault((vector, config), []).append(term)
+
+    filters = []
+    ranks = []
+    for (vector, config), vector_terms in terms.items():
+        query = func.to_tsquery(config, ' & '.join(vector_terms))
+        filters.append(voter_lookup.c[vector].bool_op('@@')(query))
+        ranks.append(func.ts_rank(voter_lookup.c[vector], query))
+
+    rank = sum(ranks[1:], ranks[0]) if ranks else None
+    return filters, rank
@@ -0,0 +1,69 @@
+# so_well/advanced_search/paging.py
+import base64
+import json
+from sqlalchemy import and_, or_, tuple_
+from ..utils import logger
+
+DEFAULT_PAGE_SIZE = 40
+MAX_PAGE_SIZE = 200
+
+
+def page_size(data):
+    """Requested page size, clamped to 1..MAX_PAGE_SIZE."""
+    try:
+        size = int(data.get('page_size') or DEFAULT_PAGE_SIZE)
+    except (TypeError, ValueError):
+        size = DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+def encode_cursor(values):
+    """Opaque cursor for the sort key values of the last row on a page."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor, length):
+    """Sort key values from a cursor, or None when there is none. Raises ValueError if malformed."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {str(e)}")
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("Invalid cursor: wrong number of sort keys")
+    return values
+
+def keyset_after(sort_keys, values):
+    """
+    Filter for rows that sort after `values` under `sort_keys`, a list of
+    (expression, descending). All-ascending keys become one row comparison, which a
+    matching multicolumn btree index can serve; mixed directions are expanded.
+    """
+    if not any(descending for _, descending in sort_keys):
+        return tuple_(*[key for key, _ in sort_keys]) > tuple_(*values)
+
+    clauses = []
+    for i, ((key, descending), value) in enumerate(zip(sort_keys, values)):
+        ties = [earlier == earlier_value for (earlier, _), earlier_value in zip(sort_keys[:i], values[:i])]
+        clauses.append(and_(*ties, key < value if descending else key > value))
+    return or_(*clauses)
+
+def estimate_rows(session, query):
+    """
+    The planner's row estimate for `query` without its LIMIT, from EXPLAIN. Cheap
+    enough to run on every page, but only an estimate; None if it can't be read.
+    """
+    try:
+        statement = query.limit(None).order_by(None).statement
+        compiled = statement.compile(
+            dialect=session.get_bind().dialect,
+            compile_kwargs={'render_postcompile': True}
+        )
+        # A savepoint, so a failed EXPLAIN doesn't end the request's transaction
+        with session.begin_nested():
+            plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    except Exception as e:
+        logger.error("Error estimating search total: %s", e)
+        return None
@@ -0,0 +1,47 @@
+# so_well/advanced_search/planner.py
+import re
+from sqlalchemy import func
+from ..utils import logger
+
+EXACT = 'exact'  # No wildcards: lower(col) = 'smith'
+PREFIX = 'prefix'  # Only a trailing %: lower(col) LIKE 'smi%'
+TRIGRAM = 'trigram'  # Leading or inner wildcards: col ILIKE '%son'
+MATCH_ANY = 'any'  # Nothing but %: any non-null value
+
+TRIGRAM_MIN_LITERAL = 3  # pg_trgm can only narrow a search with a literal run this long
+
+WILDCARDS = re.compile(r'[%_]')
+
+
+def pattern_shape(pattern):
+    """
+    Classifies a SQL LIKE pattern (as produced by wildcard_to_sql) by the index that
+    can serve it: the lower() btree for exact and prefix patterns, the trigram GIN
+    index for everything else.
+    """
+    literal = pattern.rstrip('%')
+    if not literal:
+        return MATCH_ANY
+    if not WILDCARDS.search(literal):
+        return EXACT if literal == pattern else PREFIX
+    return TRIGRAM
+
+def pattern_filter(column, pattern):
+    """
+    Builds the filter for `column` matching `pattern`, written so the planner can use
+    the column's lower() btree or trigram index (see the trigram_search migration).
+    """
+    shape = pattern_shape(pattern)
+    if shape == MATCH_ANY:
+        clause = column.isnot(None)
+    elif shape == EXACT:
+        clause = func.lower(column) == pattern
+    elif shape == PREFIX:
+        clause = func.lower(column).like(pattern.rstrip('%') + '%')
+    else:
+        if max((len(run) for run in WILDCARDS.split(pattern)), default=0) < TRIGRAM_MIN_LITERAL:
+            logger.debug("Pattern %s on %s is too short for the trigram index", pattern, column.key)
+        clause = column.ilike(pattern)
+
+    logger.debug("Planned %s lookup on %s for pattern: %s", shape, column.key, pattern)
+    return clause
@@ -1,13 +1,34 @@
 # so_well/advanced_search/routes.py
+import os
 import re
-from flask import Blueprint, request, jsonify
-from sqlalchemy import func, distinct, and_
+from flask import Blueprint, request, jsonify, g
+from sqlalchemy import and_, cast, func
+from sqlalchemy.dialects.postgresql import REAL
 from ..models import db, Voter, Address
 from ..utils import logger
+from ..utils.facets import data_version, facet_cache
+from ..utils.refresh import lookup_freshness
+from .planner import pattern_filter
+from .lookup import FTS_FIELDS, voter_lookup, fts_conditions, needs_pattern_search, prefix_terms
+from .paging import page_size, encode_cursor, decode_cursor, keyset_after, estimate_rows
+from .fuzzy import fuzzy_query
+from .cache import search_cache
+from .batch import MAX_BATCH_SPECS, DEFAULT_CANDIDATES, MAX_CANDIDATES, batch_lookup
 from sqlalchemy.dialects import postgresql
 
 advanced_search_bp = Blueprint('advanced_search', __name__, url_prefix='/advanced_search')
 
+# Ranked full-text search over voter_lookup, ILIKE on the base tables, phonetic/trigram
+# matching, or one free-text address matched on its USPS-normalized form
+SEARCH_MODES = ('fts', 'ilike', 'fuzzy', 'address')
+DEFAULT_SEARCH_MODE = os.getenv('SEARCH_MODE', 'ilike')  # fts changes exact matches to prefix matches, so it is opt-in
+
+# Replaced by the free-text address in address mode
+STREET_FIELDS = ('house_number', 'house_number_suffix', 'street_name', 'street_type', 'direction', 'post_direction')
+
+# Stable sort for paging; full-text searches sort by rank first
+NAME_ORDER = [(Voter.last_name, False), (Voter.first_name, False), (Voter.identification_number, False)]
+
 def wildcard_to_sql(wildcard):
     """
     Convert user-friendly wildcards to SQL wildcards.
@@ -16,138 +37,280 @@ def wildcard_to_sql(wildcard):
     wildcard = re.sub(r'\?', '_', wildcard)
     return wildcard.lower()
 
+def voter_result(voter, address):
+    """One search result; `voter` and `address` may be the same row when both come from one query."""
+    full_address = f"{address.house_number or ''} {address.house_number_suffix or ''} {address.direction or ''} {address.street_name or ''} {address.street_type or ''} {address.post_direction or ''}".strip()
+    return {
+        'first_name': voter.first_name,
+        'middle_name': voter.middle_name,
+        'last_name': voter.last_name,
+        'suffix': voter.suffix,
+        'full_address': full_address,
+        'apartment_number': address.apt_num,
+        'city': address.city,
+        'state': address.state,
+        'zip_code': address.zip[:5],
+        'status': voter.status,
+        'voter_id': voter.identification_number
+    }
 
+def search_shape(data, mode):
+    """Which search fields were set and whether they held wildcards, without their values."""
+    fields = {}
+    for field, value in data.items():
+        if field in ('search_mode', 'cursor', 'page_size', 'estimate_total') or not value:
+            continue
+        fields[field] = 'wildcard' if isinstance(value, str) and re.search(r'[*?]', value) else 'value'
+    return {'mode': mode, 'fields': fields, 'paged': bool(data.get('cursor'))}
+
+def search_filters(data, skip=()):
+    """
+    Builds the base table filters for a search, leaving out the fields in `skip`
+    (those matched through voter_lookup tsqueries or the normalized address).
+    """
+    filters = []
+
+    if 'first_name' in data and data['first_name'] and 'first_name' not in skip:
+        pattern = wildcard_to_sql(data['first_name'])
+        filters.append(pattern_filter(Voter.first_name, pattern))
+        logger.debug("Filter added for first_name with pattern: %s", pattern)
+    if 'middle_name' in data and data['middle_name'] and 'middle_name' not in skip:
+        pattern = wildcard_to_sql(data['middle_name'])
+        filters.append(Voter.middle_name.ilike(pattern))
+        logger.debug("Filter added for middle_name with pattern: %s", pattern)
+    if 'last_name' in data and data['last_name']:
+        pattern = wildcard_to_sql(data['last_name'])
+        filters.append(pattern_filter(Voter.last_name, pattern))
+        logger.debug("Filter added for last_name with pattern: %s", pattern)
+    if 'zip_code' in data and data['zip_code'] and 'zip_code' not in skip:
+        filters.append(Address.zip.ilike(data['zip_code'] + '%'))
+        logger.debug("Filter added for zip_code: %s", data['zip_code'])
+    if 'house_number' in data and data['house_number'] and 'house_number' not in skip:
+        pattern = wildcard_to_sql(data['house_number'])
+        filters.append(Address.house_number.ilike(pattern))
+        logger.debug("Filter added for house_number with pattern: %s", pattern)
+    if 'house_number_suffix' in data and data['house_number_suffix'] and 'house_number_suffix' not in skip:
+        pattern = wildcard_to_sql(data['house_number_suffix'])
+        filters.append(Address.house_number_suffix.ilike(pattern))
+        logger.debug("Filter added for house_number_suffix with pattern: %s", pattern)
+    if 'street_name' in data and data['street_name'] and 'street_name' not in skip:
+        pattern = wildcard_to_sql(data['street_name'])
+        filters.append(pattern_filter(Address.street_name, pattern))
+        logger.debug("Filter added for street_name with pattern: %s", pattern)
+    if 'street_type' in data and data['street_type'] and 'street_type' not in skip:
+        filters.append(Address.street_type.in_(data['street_type']))
+        logger.debug("Filter added for street_type: %s", data['street_type'])
+    if 'direction' in data and data['direction'] and 'direction' not in skip:
+        filters.append(Address.direction.in_(data['direction']))
+        logger.debug("Filter added for direction: %s", data['direction'])
+    if 'post_direction' in data and data['post_direction'] and 'post_direction' not in skip:
+        filters.append(Address.post_direction.in_(data['post_direction']))
+        logger.debug("Filter added for post_direction: %s", data['post_direction'])
+    if 'apartment_number' in data and data['apartment_number'] and 'apartment_number' not in skip:
+        pattern = wildcard_to_sql(data['apartment_number'])
+        filters.append(Address.apt_num.ilike(pattern))
+        logger.debug("Filter added for apartment_number with pattern: %s", pattern)
+    if 'city' in data and data['city'] and 'city' not in skip:
+        pattern = wildcard_to_sql(data['city'])
+        filters.append(pattern_filter(Address.city, pattern))
+        logger.debug("Filter added for city with pattern: %s", pattern)
+    if 'state' in data and data['state']:
+        pattern = data['state']
+        filters.append(Address.state == pattern)
+        logger.debug("Filter added for state: %s", pattern)
+    return filters
 
 @advanced_search_bp.route('/', methods=['POST'])
 def search_voters():
     try:
         data = request.json
         logger.info("Received search request with data: %s", data)
-        filters = []
-
-        if 'first_name' in data and data['first_name']:
-            pattern = wildcard_to_sql(data['first_name'])
-            filters.append(Voter.first_name.ilike(pattern))
-            logger.debug("Filter added for first_name with pattern: %s", pattern)
-        if 'middle_name' in data and data['middle_name']:
-            pattern = wildcard_to_sql(data['middle_name'])
-            filters.append(Voter.middle_name.ilike(pattern))
-            logger.debug("Filter added for middle_name with pattern: %s", pattern)
-        if 'last_name' in data and data['last_name']:
-            pattern = wildcard_to_sql(data['last_name'])
-            filters.append(Voter.last_name.ilike(pattern))
-            logger.debug("Filter added for last_name with pattern: %s", pattern)
-        if 'zip_code' in data and data['zip_code']:
-            filters.append(Address.zip.ilike(data['zip_code'] + '%'))
-            logger.debug("Filter added for zip_code: %s", data['zip_code'])
-        if 'house_number' in data and data['house_number']:
-            pattern = wildcard_to_sql(data['house_number'])
-            filters.append(Address.house_number.ilike(pattern))
-            logger.debug("Filter added for house_number with pattern: %s", pattern)
-        if 'house_number_suffix' in data and data['house_number_suffix']:
-            pattern = wildcard_to_sql(data['house_number_suffix'])
-            filters.append(Address.house_number_suffix.ilike(pattern))
-            logger.debug("Filter added for house_number_suffix with pattern: %s", pattern)
-        if 'street_name' in data and data['street_name']:
-            pattern = wildcard_to_sql(data['street_name'])
-            filters.append(Address.street_name.ilike(pattern))
-            logger.debug("Filter added for street_name with pattern: %s", pattern)
-        if 'street_type' in data and data['street_type']:
-            filters.append(Address.street_type.in_(data['street_type']))
-            logger.debug("Filter added for street_type: %s", data['street_type'])
-        if 'direction' in data and data['direction']:
-            filters.append(Address.direction.in_(data['direction']))
-            logger.debug("Filter added for direction: %s", data['direction'])
-        if 'post_direction' in data and data['post_direction']:
-            filters.append(Address.post_direction.in_(data['post_direction']))
-            logger.debug("Filter added for post_direction: %s", data['post_direction'])
-        if 'apartment_number' in data and data['apartment_number']:
-            pattern = wildcard_to_sql(data['apartment_number'])
-            filters.append(Address.apt_num.ilike(pattern))
-            logger.debug("Filter added for apartment_number with pattern: %s", pattern)
-        if 'city' in data and data['city']:
-            pattern = wildcard_to_sql(data['city'])
-            filters.append(Address.city.ilike(pattern))
-            logger.debug("Filter added for city with pattern: %s", pattern)
-        if 'state' in data and data['state']:
-            pattern = data['state']
-            filters.append(Address.state == pattern)
-            logger.debug("Filter added for state: %s", pattern)
-
-        query = (db.session.query(Voter, Address)
-                 .join(Address, Address.id == Voter.residence_address_id)
-                 .filter(and_(*filters))
-                 .limit(40))
+
+        mode = data.get('search_mode') or DEFAULT_SEARCH_MODE
+        if mode not in SEARCH_MODES:
+            return jsonify({"error": f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}"}), 400
+
+        # Recorded with any slow query this search runs (utils/instrument.py)
+        g.query_shape = search_shape(data, mode)
+
+        # Repeated searches are answered from the per-process cache until the data version changes
+        cache_key = search_cache.key({**data, 'search_mode': mode})
+        version = data_version.current()
+        cached = search_cache.get(cache_key, version)
+        if cached is not None:
+            logger.debug("Search cache hit")
+            return jsonify(cached)
+
+        size = page_size(data)
+        if mode == 'fuzzy':
+            # Top matches by combined similarity; no further pages
+            if not (data.get('last_name') or '').strip():
+                return jsonify({"error": "Fuzzy search needs a last name"}), 400
+            full_text = False
+            estimated_total = None
+            query = fuzzy_query(data, size + 1)
+        else:
+            # Leading or inner wildcards, and searches without any full-text terms, use the ILIKE path
+            full_text = (
+                mode == 'fts'
+                and not needs_pattern_search(data, wildcard_to_sql)
+                and any(prefix_terms(data.get(field)) for field in FTS_FIELDS)
+            )
+            if mode == 'address':
+                if not (data.get('address') or '').strip():
+                    return jsonify({"error": "Address search needs an address"}), 400
+                filters = search_filters(data, STREET_FIELDS)
+                # Both sides go through electorate.usps_normalize, so '600 North Walter Reed Drive'
+                # matches '600 N WALTER REED DR'; a constant prefix can use the text_pattern_ops index
+                filters.append(Address.normalized_address.like(func.electorate.usps_normalize(data['address']) + '%'))
+            else:
+                filters = search_filters(data, FTS_FIELDS if full_text else ())
+            logger.debug("Search mode: %s", 'fts' if full_text else mode)
+
+            query = (db.session.query(Voter, Address)
+                     .join(Address, Address.id == Voter.residence_address_id))
+            if full_text:
+                fts_filters, rank = fts_conditions(data)
+                query = (query
+                         .add_columns(rank.label('rank'))
+                         .join(voter_lookup, voter_lookup.c.identification_number == Voter.identification_number)
+                         .filter(and_(*filters, *fts_filters)))
+                sort_keys = [(rank, True)] + NAME_ORDER
+            else:
+                query = query.filter(and_(*filters))
+                sort_keys = NAME_ORDER
+
+            # Estimated from the plan of the whole search, before paging
+            estimated_total = estimate_rows(db.session, query) if data.get('estimate_total') else None
+
+            # Keyset pagination: the cursor holds the sort key of the previous page's last row
+            try:
+                after = decode_cursor(data.get('cursor'), len(sort_keys))
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            if after is not None:
+                if full_text:
+                    # ts_rank is real; compare as real so the row on the boundary matches exactly
+                    after[0] = cast(after[0], REAL)
+                query = query.filter(keyset_after(sort_keys, after))
+
+            query = (query
+                     .order_by(*[key.desc() if descending else key for key, descending in sort_keys])
+                     .limit(size + 1))
 
         # Log the compiled SQL query
         compiled_query = query.statement.compile(dialect=postgresql.dialect())
         logger.debug("Executing search query with SQL: %s", str(compiled_query))
 
+        rows = query.all()
+        has_more = len(rows) > size
+        rows = rows[:size]
+
         results = []
-        for voter, address in query:
-            full_address = f"{address.house_number or ''} {address.house_number_suffix or ''} {address.direction or ''} {address.street_name or ''} {address.street_type or ''} {address.post_direction or ''}".strip()
-            results.append({
-                'first_name': voter.first_name,
-                'middle_name': voter.middle_name,
-                'last_name': voter.last_name,
-                'suffix': voter.suffix,
-                'full_address': full_address,
-                'apartment_number': address.apt_num,
-                'city': address.city,
-                'state': address.state,
-                'zip_code': address.zip[:5],
-                'status': voter.status,
-                'voter_id': voter.identification_number
-            })
+        for row in rows:
+            results.append(voter_result(row[0], row[1]))
+            if mode == 'fuzzy':
+                results[-1]['score'] = round(row.score, 3)
         logger.info("Found %d results.", len(results))
 
-        # Calculate counts
+        next_cursor = None
+        if has_more and mode != 'fuzzy':
+            last = rows[-1]
+            values = [last[0].last_name, last[0].first_name, last[0].identification_number]
+            next_cursor = encode_cursor([last.rank] + values if full_text else values)
+
+        # Facet counts are precomputed at load time (utils/facets.py)
         try:
-            direction_counts = db.session.query(Address.direction).group_by(Address.direction).all()
-            post_direction_counts = db.session.query(Address.post_direction).group_by(Address.post_direction).all()
-            street_type_counts = db.session.query(Address.street_type).group_by(Address.street_type).all()
+            direction_counts = [{'value': facet['value']} for facet in facet_cache.get('direction')]
+            post_direction_counts = [{'value': facet['value']} for facet in facet_cache.get('post_direction')]
+            street_type_counts = [{'value': facet['value']} for facet in facet_cache.get('street_type')]
         except Exception as e:
             logger.error("Error calculating counts: %s", e)
             return jsonify({
                 "error": "An error occurred while calculating counts."
             }), 500
 
-        direction_counts = [{'value': dc[0]} for dc in direction_counts if dc[0] is not None]
-        post_direction_counts = [{'value': pdc[0]} for pdc in post_direction_counts if pdc[0] is not None]
-        street_type_counts = [{'value': stc[0]} for stc in street_type_counts if stc[0] is not None]
-
         logger.debug("Calculated counts: direction=%s, post_direction=%s, street_type=%s", direction_counts, post_direction_counts, street_type_counts)
 
-        return jsonify({
+        response = {
             "results": results,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+            "estimated_total": estimated_total,
             "direction_counts": direction_counts,
             "post_direction_counts": post_direction_counts,
             "street_type_counts": street_type_counts
-        })
+        }
+        search_cache.put(cache_key, version, response)
+        return jsonify(response)
     except Exception as e:
         logger.error("Unhandled exception: %s", e)
         return jsonify({
             "error": "An unhandled exception occurred."
         }), 500
 
+@advanced_search_bp.route('/batch', methods=['POST'])
+def batch_search():
+    """
+    Looks up several search specs (e.g. every row of a sheet) in one query. Each spec
+    needs a last_name and may carry a row_id (default: its position); the response
+    has the candidates for each spec in request order.
+    """
+    try:
+        data = request.json or {}
+        specs = data.get('rows')
+        if not isinstance(specs, list) or not specs:
+            return jsonify({"error": "rows must be a non-empty list of search specs"}), 400
+        if len(specs) > MAX_BATCH_SPECS:
+            return jsonify({"error": f"At most {MAX_BATCH_SPECS} search specs per request"}), 400
+        try:
+            candidates = max(1, min(int(data.get('candidates') or DEFAULT_CANDIDATES), MAX_CANDIDATES))
+            row_ids = [int(spec.get('row_id', position)) for position, spec in enumerate(specs, start=1)]
+        except (TypeError, ValueError, AttributeError):
+            return jsonify({"error": "Each spec must be an object and row_id and candidates must be integers"}), 400
+        if len(set(row_ids)) != len(row_ids):
+            return jsonify({"error": "row_id values must be unique"}), 400
+
+        g.query_shape = {'mode': 'batch', 'specs': len(specs)}
+        resolvable = [(row_id, spec) for row_id, spec in zip(row_ids, specs) if (spec.get('last_name') or '').strip()]
+        matches = batch_lookup(resolvable, candidates, wildcard_to_sql) if resolvable else {}
+
+        rows = []
+        for row_id in row_ids:
+            if row_id not in matches:
+                rows.append({'row_id': row_id, 'results': [], 'error': 'last_name is required'})
+            else:
+                rows.append({'row_id': row_id, 'results': [voter_result(row, row) for row in matches[row_id]]})
+        logger.info("Batch search resolved %d specs with %d candidates.", len(rows), sum(len(row['results']) for row in rows))
+
+        return jsonify({"rows": rows})
+    except Exception as e:
+        logger.error("Unhandled exception in batch search: %s", e)
+        return jsonify({
+            "error": "An unhandled exception occurred."
+        }), 500
+
+@advanced_search_bp.route('/cache', methods=['GET'])
+def get_cache_stats():
+    return jsonify(search_cache.stats())
+
+@advanced_search_bp.route('/freshness', methods=['GET'])
+def get_freshness():
+    return jsonify(lookup_freshness())
+
 @advanced_search_bp.route('/states', methods=['GET'])
 def get_states():
-    states = db.session.query(distinct(Address.state)).all()
-    states = [state[0] for state in states]
+    states = [facet['value'] for facet in facet_cache.get('state')]
     return jsonify(states)
 
 @advanced_search_bp.route('/directions', methods=['GET'])
 def get_directions():
-    directions = db.session.query(Address.direction, func.count(Address.id)).group_by(Address.direction).filter(Address.direction.isnot(None)).all()
-    post_directions = db.session.query(Address.post_direction, func.count(Address.id)).group_by(Address.post_direction).filter(Address.post_direction.isnot(None)).all()
-
-    directions = [{'value': direction[0], 'count': direction[1]} for direction in directions]
-    post_directions = [{'value': post_direction[0], 'count': post_direction[1]} for post_direction in post_directions]
+    directions = facet_cache.get('direction')
+    post_directions = facet_cache.get('post_direction')
 
     return jsonify({'directions': directions, 'post_directions': post_directions})
 
 @advanced_search_bp.route('/street_types', methods=['GET'])
 def get_street_types():
-    street_types = db.session.query(Address.street_type, func.count(Address.id)).group_by(Address.street_type).filter(Address.street_type.isnot(None)).all()
-    street_types = [{'value': street_type[0], 'count': street_type[1]} for street_type in street_types]
+    street_types = facet_cache.get('street_type')
     return jsonify({'street_types': street_types})
@@ -65,6 +65,16 @@ class Address(db.Model):
     state = db.Column(db.String(50), nullable=False, comment="State of residence")
     zip = db.Column(db.String(10), index=True, nullable=False, comment="ZIP code of residence")
     full_address_searchable = db.Column(TSVectorType('house_number', 'street_name', 'street_type', 'city', 'zip'))
+    normalized_address = db.Column(
+        db.Text,
+        db.Computed(
+            "electorate.usps_normalize(coalesce(house_number, '') || ' ' || coalesce(house_number_suffix, '') || ' ' || "
+            "coalesce(direction, '') || ' ' || coalesce(street_name, '') || ' ' || coalesce(street_type, '') || ' ' || "
+            "coalesce(post_direction, ''))",
+            persisted=True
+        ),
+        comment="House number and street, USPS-normalized"
+    )
     created_at = db.Column(db.DateTime, default=func.now(), nullable=False, comment="Record creation date")
     updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now(), nullable=False, comment="Record last update date")
     def __repr__(self):
@@ -0,0 +1,152 @@
+# so_well/signatures/bulk.py
+from datetime import date
+from sqlalchemy import text
+from ..models import db
+from .verify import UPSERT_CLAUSE, recorded_signatures
+
+MAX_BULK_SIGNATURES = 600  # Signature rows per request; 50 sheets of 12
+ROWS_PER_SHEET = 12  # Matches the collected_row_number_check constraint
+
+# Column widths in signatures.collected, checked up front so one long value can't
+# fail the whole insert
+FIELD_LIMITS = {
+    'voter_id': 50,
+    'first_name': 50,
+    'last_name': 50,
+    'apt': 50,
+    'city': 50,
+    'state': 50,
+    'zip': 5,
+    'last_4': 4,
+    'idempotency_key': 64,
+}
+
+# signatures.collected column -> field in the request row
+TEXT_FIELDS = {
+    'voter_id': 'voter_id',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'full_street_address': 'address',
+    'apt': 'apartment_number',
+    'city': 'city',
+    'state': 'state',
+    'zip': 'zip_code',
+    'last_4': 'last_four_ssn',
+    'idempotency_key': 'idempotency_key',
+}
+
+SHEETS_SQL = text("SELECT id FROM signatures.sheets WHERE id = ANY(:sheet_ids);")
+
+# The rows arrive as parallel arrays and are recorded with one multi-row INSERT.
+# Voters are resolved with a single join on identification_number; rows without a
+# match keep what was typed and are recorded as 'No Match Found'. Sheet rows
+# already entered are only replaced when the request asks to (:replace).
+RECORD_SIGNATURES_SQL = text(f"""
+    WITH entry AS (
+        SELECT *
+        FROM unnest(
+            CAST(:sheet_ids AS int[]), CAST(:row_ids AS int[]), CAST(:voter_ids AS text[]),
+            CAST(:first_names AS text[]), CAST(:last_names AS text[]), CAST(:addresses AS text[]),
+            CAST(:apts AS text[]), CAST(:cities AS text[]), CAST(:states AS text[]),
+            CAST(:zips AS text[]), CAST(:last_4s AS text[]), CAST(:dates AS date[]),
+            CAST(:idempotency_keys AS text[])
+        ) AS e(sheet_id, row_id, voter_id, first_name, last_name, full_street_address,
+               apt, city, state, zip, last_4, date_collected, idempotency_key)
+    ), matched AS (
+        SELECT
+            e.*, v.identification_number AS matched_voter_id, v.first_name AS voter_first_name,
+            v.last_name AS voter_last_name, a.apt_num, a.city AS voter_city, a.state AS voter_state,
+            left(a.zip, 5) AS voter_zip,
+            concat_ws(' ', a.house_number, a.house_number_suffix, a.direction, a.street_name,
+                      a.street_type, a.post_direction) AS voter_street_address
+        FROM entry e
+        LEFT JOIN electorate.voters v ON v.identification_number = e.voter_id
+        LEFT JOIN electorate.address a ON a.id = v.residence_address_id
+    )
+    INSERT INTO signatures.collected (
+        voter_id, first_name, last_name, full_street_address, apt, city, state, zip,
+        status, sheet_id, row_id, last_4, date_collected, idempotency_key
+    )
+    SELECT
+        matched_voter_id,
+        CASE WHEN matched_voter_id IS NULL THEN first_name ELSE voter_first_name END,
+        CASE WHEN matched_voter_id IS NULL THEN last_name ELSE voter_last_name END,
+        CASE WHEN matched_voter_id IS NULL THEN full_street_address ELSE voter_street_address END,
+        CASE WHEN matched_voter_id IS NULL THEN apt ELSE apt_num END,
+        CASE WHEN matched_voter_id IS NULL THEN city ELSE voter_city END,
+        CASE WHEN matched_voter_id IS NULL THEN state ELSE voter_state END,
+        CASE WHEN matched_voter_id IS NULL THEN zip ELSE voter_zip END,
+        CASE WHEN matched_voter_id IS NULL THEN 'No Match Found' ELSE 'Matched' END,
+        sheet_id, row_id, last_4, date_collected, idempotency_key
+    FROM matched
+    {UPSERT_CLAUSE}
+    RETURNING id, sheet_id, row_id, voter_id, status, false AS replayed;
+""")
+
+
+def bulk_entry(row):
+    """
+    Validates one signature row (the /signatures/verify payload) and returns it in
+    signatures.collected terms. Raises ValueError with the reason it can't be recorded.
+    """
+    if not isinstance(row, dict):
+        raise ValueError('Each signature must be an object')
+    if not row.get('sheet_number') or not row.get('row_number') or not row.get('date_collected'):
+        raise ValueError('Missing required fields')
+
+    try:
+        sheet_id = int(row['sheet_number'])
+        row_id = int(row['row_number'])
+    except (TypeError, ValueError):
+        raise ValueError('sheet_number and row_number must be integers')
+    if not 1 <= row_id <= ROWS_PER_SHEET:
+        raise ValueError(f'row_number must be between 1 and {ROWS_PER_SHEET}')
+    try:
+        date_collected = date.fromisoformat(str(row['date_collected']))
+    except ValueError:
+        raise ValueError('date_collected must be a YYYY-MM-DD date')
+
+    entry = {'sheet_id': sheet_id, 'row_id': row_id, 'date_collected': date_collected}
+    for field, key in TEXT_FIELDS.items():
+        value = row.get(key)
+        entry[field] = None if value is None else str(value)
+    entry['voter_id'] = entry['voter_id'] or None
+    for field, limit in FIELD_LIMITS.items():
+        if entry[field] is not None and len(entry[field]) > limit:
+            raise ValueError(f'{field} is longer than {limit} characters')
+    return entry
+
+def record_signatures(entries, replace=False):
+    """
+    Records validated entries in one INSERT ... SELECT, overwriting occupied rows
+    only with `replace`. Returns ({(sheet_id, row_id): (id, voter_id, status,
+    replayed)}, conflicts), where conflicts are the keys whose row holds a different
+    entry that was kept. (sheet_id, row_id) must be unique within `entries`.
+    The caller commits.
+    """
+    columns = {
+        'sheet_ids': 'sheet_id', 'row_ids': 'row_id', 'voter_ids': 'voter_id',
+        'first_names': 'first_name', 'last_names': 'last_name', 'addresses': 'full_street_address',
+        'apts': 'apt', 'cities': 'city', 'states': 'state', 'zips': 'zip', 'last_4s': 'last_4',
+        'dates': 'date_collected', 'idempotency_keys': 'idempotency_key'
+    }
+    params = {param: [entry[field] for entry in entries] for param, field in columns.items()}
+    params['replace'] = replace
+    recorded = {
+        (row.sheet_id, row.row_id): row
+        for row in db.session.execute(RECORD_SIGNATURES_SQL, params)
+    }
+
+    conflicts = set()
+    kept = [entry for entry in entries if (entry['sheet_id'], entry['row_id']) not in recorded]
+    if kept:
+        for key, signature in recorded_signatures(kept).items():
+            if signature.replayed:
+                recorded[key] = signature
+            else:
+                conflicts.add(key)
+    return recorded, conflicts
+
+def known_sheets(sheet_ids):
+    """The subset of `sheet_ids` that exist in signatures.sheets."""
+    return set(db.session.execute(SHEETS_SQL, {'sheet_ids': list(sheet_ids)}).scalars())
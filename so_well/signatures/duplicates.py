@@ -0,0 +1,58 @@
+# so_well/signatures/duplicates.py
+from sqlalchemy import text
+from ..models import db
+
+# Every other signature by the same voter, as a correlated lookup on
+# ix_signatures_collected_voter_id. `{alias}` is the signature being checked.
+OTHER_SIGNATURES = """
+    (SELECT json_agg(json_build_object('id', d.id, 'sheet_id', d.sheet_id, 'row_id', d.row_id) ORDER BY d.id)
+     FROM signatures.collected d
+     WHERE d.voter_id = {alias}.voter_id AND d.id <> {alias}.id) AS duplicates
+"""
+
+SIGNER_ROWS_SQL = text("""
+    SELECT id, sheet_id, row_id, voter_id
+    FROM signatures.collected
+    WHERE voter_id = ANY(CAST(:voter_ids AS text[]))
+    ORDER BY id;
+""")
+
+# Voters with more than one signature, grouped in voter_id order straight off the index
+DUPLICATE_SIGNERS_SQL = text("""
+    SELECT
+        c.voter_id, min(c.first_name) AS first_name, min(c.last_name) AS last_name,
+        count(*) AS signatures,
+        json_agg(json_build_object(
+            'id', c.id, 'sheet_id', c.sheet_id, 'row_id', c.row_id, 'date_collected', c.date_collected
+        ) ORDER BY c.date_collected, c.id) AS sheets
+    FROM signatures.collected c
+    WHERE c.voter_id IS NOT NULL
+    GROUP BY c.voter_id
+    HAVING count(*) > 1
+    ORDER BY count(*) DESC, c.voter_id;
+""")
+
+
+def signer_duplicates(signatures):
+    """
+    The other signatures by each signer in `signatures` (rows with id and voter_id),
+    as {id: [{'id', 'sheet_id', 'row_id'}]}. One indexed lookup for all of them.
+    """
+    voter_ids = list({signature.voter_id for signature in signatures if signature.voter_id})
+    by_voter = {}
+    if voter_ids:
+        for row in db.session.execute(SIGNER_ROWS_SQL, {'voter_ids': voter_ids}):
+            by_voter.setdefault(row.voter_id, []).append(row)
+
+    return {
+        signature.id: [
+            {'id': row.id, 'sheet_id': row.sheet_id, 'row_id': row.row_id}
+            for row in by_voter.get(signature.voter_id, [])
+            if row.id != signature.id
+        ]
+        for signature in signatures
+    }
+
+def duplicate_signers():
+    """Every voter who signed more than once, with the sheets and rows they signed on."""
+    return [dict(row) for row in db.session.execute(DUPLICATE_SIGNERS_SQL).mappings()]
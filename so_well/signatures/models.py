@@ -4,7 +4,10 @@ from ..models import db
 
 class SignatureMatch(db.Model):
     __tablename__ = 'collected'
-    __table_args__ = {'schema': 'signatures'}
+    __table_args__ = (
+        db.UniqueConstraint('sheet_id', 'row_id', name='collected_sheet_row_unique'),
+        {'schema': 'signatures'}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     sheet_id = db.Column(db.Integer, nullable=False)
@@ -19,6 +22,7 @@ class SignatureMatch(db.Model):
     zip = db.Column(db.String(5), nullable=True)
     last_4 = db.Column(db.String(4), nullable=True)
     status = db.Column(db.String(50), nullable=False, server_default='Recorded')
+    idempotency_key = db.Column(db.String(64), nullable=True)  # Client key of the submission that last wrote the row
     date_collected = db.Column(db.Date, nullable=False, default=db.func.current_date())
     created_at = db.Column(db.DateTime(timezone=True), nullable=False, default=db.func.now())
     updated_at = db.Column(db.DateTime(timezone=True), nullable=False, default=db.func.now(), onupdate=db.func.now())
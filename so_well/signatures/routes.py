@@ -2,10 +2,12 @@
 
 from flask import Blueprint, request, jsonify
 from sqlalchemy.exc import SQLAlchemyError
-from ..models import db, Voter, Address
-from .models import SignatureMatch
+from ..models import db
+from .verify import record_signature
+from .bulk import MAX_BULK_SIGNATURES, bulk_entry, known_sheets, record_signatures
+from .duplicates import duplicate_signers, signer_duplicates
 from ..utils import logger
-from sqlalchemy import func
+from ..utils.counters import signature_counts
 
 signatures_bp = Blueprint('signatures', __name__, url_prefix='/signatures')
 
@@ -33,68 +35,41 @@ def verify_signature():
             logger.error("Missing required fields")
             return jsonify({'error': 'Missing required fields'}), 400
 
-        logger.debug(f"Fetching voter details for ID: {voter_identification}")
-        voter = Voter.query.filter_by(identification_number=voter_identification).first()
-        if not voter:
-            # If no voter found, set status to 'No Match Found'
-            status = 'No Match Found'
-            new_signature = SignatureMatch(
-                voter_id=None,
-                first_name=first_name,
-                last_name=last_name,
-                full_street_address=full_street_address,
-                apt=apt,
-                city=city,
-                state=state,
-                zip=zip_code,
-                sheet_id=int(sheet_id),
-                row_id=int(row_id),
-                last_4=last_four_ssn,
-                date_collected=date_collected,
-                status=status
-            )
-            db.session.add(new_signature)
-            db.session.commit()
-
-            insert_query = str(new_signature)
-            logger.debug(f"No voter found. Inserted new record with SQL: {insert_query}")
-
-            return jsonify({'message': 'No match found and recorded'}), 201
-
-        address = Address.query.filter_by(id=voter.residence_address_id).first()
-        if not address:
-            logger.error("Voter address not found")
-            return jsonify({'error': 'Voter address not found'}), 404
-
-        # Prepare the full street address
-        full_street_address = f"{address.house_number or ''} {address.house_number_suffix or ''} {address.direction or ''} {address.street_name or ''} {address.street_type or ''} {address.post_direction or ''}".strip()
-
-        # Set status to 'Matched' if voter is found
-        status = 'Matched'
-
-        # Create a new SignatureMatch record in the collected table
-        new_signature = SignatureMatch(
-            voter_id=voter.identification_number,
-            first_name=voter.first_name,
-            last_name=voter.last_name,
-            full_street_address=full_street_address,
-            apt=address.apt_num,
-            city=address.city,
-            state=address.state,
-            zip=address.zip[:5],
-            sheet_id=int(sheet_id),
-            row_id=int(row_id),
-            last_4=last_four_ssn,
-            date_collected=date_collected,
-            status=status
-        )
-        db.session.add(new_signature)
+        # One INSERT ... SELECT resolves the voter and residence address and records the row
+        signature, conflict = record_signature({
+            'voter_id': voter_identification,
+            'first_name': first_name,
+            'last_name': last_name,
+            'full_street_address': full_street_address,
+            'apt': apt,
+            'city': city,
+            'state': state,
+            'zip': zip_code,
+            'sheet_id': int(sheet_id),
+            'row_id': int(row_id),
+            'last_4': last_four_ssn,
+            'date_collected': date_collected,
+            'idempotency_key': data.get('idempotency_key') or None
+        }, replace=bool(data.get('replace')))
+        if conflict:
+            db.session.rollback()
+            logger.warning(f"Sheet {sheet_id} row {row_id} already holds signature {signature.id}; not replaced")
+            return jsonify({
+                'error': f'Sheet {sheet_id} row {row_id} is already recorded; send replace to overwrite it',
+                'existing': {'id': signature.id, 'voter_id': signature.voter_id, 'status': signature.status}
+            }), 409
         db.session.commit()
+        logger.debug(f"Recorded signature {signature.id} for voter {signature.voter_id}: {signature.status}")
 
-        insert_query = str(new_signature)
-        logger.debug(f"Inserted new signature with SQL: {insert_query}")
+        duplicates = signature.duplicates or []
+        if duplicates:
+            logger.warning(f"Voter {signature.voter_id} has also signed on {len(duplicates)} other sheet row(s)")
 
-        return jsonify({'message': 'Signature matched and recorded successfully'}), 201
+        # A replayed submission gets the same answer without writing anything
+        status_code = 200 if signature.replayed else 201
+        if signature.status == 'No Match Found':
+            return jsonify({'message': 'No match found and recorded', 'duplicates': duplicates}), status_code
+        return jsonify({'message': 'Signature matched and recorded successfully', 'duplicates': duplicates}), status_code
 
     except SQLAlchemyError as e:
         logger.error(f'Error recording signature: {str(e)}', exc_info=True)
@@ -104,15 +79,109 @@ def verify_signature():
         logger.error(f'Unexpected error: {str(e)}', exc_info=True)
         return jsonify({'error': 'An unexpected error occurred'}), 500
 
+@signatures_bp.route('/bulk', methods=['POST'])
+def bulk_signatures():
+    """
+    Records a stack of signature rows, each shaped like a /verify request, in one
+    transaction. Every row is validated first; the valid ones are matched and
+    inserted with a single statement. The response has a result per row, in
+    request order, with its status or the reason it was not recorded. Sheet rows
+    already recorded are kept unless the request sends "replace": true.
+    """
+    try:
+        data = request.json or {}
+        rows = data.get('signatures')
+        if not isinstance(rows, list) or not rows:
+            return jsonify({'error': 'signatures must be a non-empty list'}), 400
+        if len(rows) > MAX_BULK_SIGNATURES:
+            return jsonify({'error': f'At most {MAX_BULK_SIGNATURES} signatures per request'}), 400
+
+        results = []
+        entries = {}
+        for index, row in enumerate(rows):
+            result = {'index': index}
+            results.append(result)
+            try:
+                entry = bulk_entry(row)
+            except ValueError as e:
+                result.update({'status': 'error', 'error': str(e)})
+                continue
+            key = (entry['sheet_id'], entry['row_id'])
+            result.update({'sheet_number': key[0], 'row_number': key[1]})
+            if key in entries:
+                result.update({'status': 'error', 'error': 'Sheet and row repeated in this request'})
+                continue
+            entries[key] = entry
+
+        sheets = known_sheets({sheet_id for sheet_id, _ in entries}) if entries else set()
+        for result in results:
+            if 'status' not in result and result['sheet_number'] not in sheets:
+                entries.pop((result['sheet_number'], result['row_number']))
+                result.update({'status': 'error', 'error': 'Sheet not found'})
+
+        recorded, conflicts = record_signatures(list(entries.values()), bool(data.get('replace'))) if entries else ({}, set())
+        db.session.commit()
+
+        for result in results:
+            if 'status' not in result and (result['sheet_number'], result['row_number']) in conflicts:
+                result.update({'status': 'error', 'error': 'Sheet row already recorded; send replace to overwrite it'})
+
+        # Checked after the insert so signers repeated within this request are caught too
+        duplicates = signer_duplicates(list(recorded.values()))
+        for result in results:
+            signature = None if 'status' in result else recorded.get((result['sheet_number'], result['row_number']))
+            if signature:
+                result.update({
+                    'status': signature.status,
+                    'id': signature.id,
+                    'voter_id': signature.voter_id,
+                    'replayed': signature.replayed,
+                    'duplicates': duplicates[signature.id]
+                })
+        logger.info(f"Bulk signature entry: {len(recorded)} of {len(rows)} rows recorded")
+
+        return jsonify({
+            'results': results,
+            'recorded': len(recorded),
+            'matched': sum(1 for signature in recorded.values() if signature.status == 'Matched'),
+            'errors': sum(1 for result in results if result['status'] == 'error')
+        }), 200
+
+    except SQLAlchemyError as e:
+        logger.error(f'Error recording signatures: {str(e)}', exc_info=True)
+        db.session.rollback()
+        return jsonify({'error': 'Database error'}), 500
+    except Exception as e:
+        logger.error(f'Unexpected error: {str(e)}', exc_info=True)
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+
+@signatures_bp.route('/duplicates', methods=['GET'])
+def get_duplicate_signers():
+    """Lists every voter with more than one collected signature and the sheets they signed."""
+    try:
+        signers = duplicate_signers()
+        logger.debug(f"Found {len(signers)} duplicate signers")
+        return jsonify({'signers': signers, 'count': len(signers)}), 200
+    except SQLAlchemyError as e:
+        logger.error(f'Error fetching duplicate signers: {str(e)}', exc_info=True)
+        return jsonify({'error': 'Database error'}), 500
+    except Exception as e:
+        logger.error(f'Unexpected error: {str(e)}', exc_info=True)
+        return jsonify({'error': 'An unexpected error occurred'}), 500
+
 @signatures_bp.route('/stats', methods=['GET'])
 def get_signature_stats():
+    """
+    Signatures per status, read from the trigger-maintained counters. Pass sheet_id
+    or date (YYYY-MM-DD, the collection date) for the counts of one sheet or day.
+    """
     try:
-        stats = db.session.query(
-            SignatureMatch.status,
-            func.count(SignatureMatch.id).label('count')
-        ).group_by(SignatureMatch.status).all()
-
-        stats_data = {status: count for status, count in stats}
+        if request.args.get('sheet_id'):
+            stats_data = signature_counts('sheet', request.args['sheet_id'])
+        elif request.args.get('date'):
+            stats_data = signature_counts('day', request.args['date'])
+        else:
+            stats_data = signature_counts()
         logger.debug(f"Signature stats data: {stats_data}")
 
         return jsonify(stats_data), 200
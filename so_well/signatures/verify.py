@@ -0,0 +1,96 @@
+# so_well/signatures/verify.py
+from sqlalchemy import text
+from ..models import db
+from .duplicates import OTHER_SIGNATURES
+
+# A sheet row holds one signature. An occupied row is only overwritten when the
+# client asks to replace it (:replace) and it isn't a replay of the submission that
+# wrote it; otherwise the row is left alone and the statement returns nothing for it
+UPSERT_CLAUSE = """
+    ON CONFLICT ON CONSTRAINT collected_sheet_row_unique DO UPDATE SET
+        voter_id = EXCLUDED.voter_id, first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name,
+        full_street_address = EXCLUDED.full_street_address, apt = EXCLUDED.apt, city = EXCLUDED.city,
+        state = EXCLUDED.state, zip = EXCLUDED.zip, status = EXCLUDED.status, last_4 = EXCLUDED.last_4,
+        date_collected = EXCLUDED.date_collected, idempotency_key = EXCLUDED.idempotency_key
+    WHERE CAST(:replace AS boolean)
+        AND (EXCLUDED.idempotency_key IS NULL OR collected.idempotency_key IS DISTINCT FROM EXCLUDED.idempotency_key)
+"""
+
+# Matches the voter and copies their name and residence address into
+# signatures.collected in one statement. Without a matching voter the entry is
+# recorded as typed, as 'No Match Found'. The same statement looks up the voter's
+# other signatures, which it sees as they were before this one was written.
+RECORD_SIGNATURE_SQL = text(f"""
+    WITH matched AS (
+        SELECT
+            v.identification_number AS voter_id, v.first_name, v.last_name,
+            concat_ws(' ', a.house_number, a.house_number_suffix, a.direction, a.street_name,
+                      a.street_type, a.post_direction) AS full_street_address,
+            a.apt_num AS apt, a.city, a.state, left(a.zip, 5) AS zip, 'Matched' AS status
+        FROM electorate.voters v
+        JOIN electorate.address a ON a.id = v.residence_address_id
+        WHERE v.identification_number = :voter_id
+    ), entry AS (
+        SELECT * FROM matched
+        UNION ALL
+        SELECT NULL, :first_name, :last_name, :full_street_address, :apt, :city, :state, :zip, 'No Match Found'
+        WHERE NOT EXISTS (SELECT 1 FROM matched)
+    ), recorded AS (
+        INSERT INTO signatures.collected (
+            voter_id, first_name, last_name, full_street_address, apt, city, state, zip,
+            status, sheet_id, row_id, last_4, date_collected, idempotency_key
+        )
+        SELECT
+            voter_id, first_name, last_name, full_street_address, apt, city, state, zip,
+            status, :sheet_id, :row_id, :last_4, CAST(:date_collected AS date), :idempotency_key
+        FROM entry
+        {UPSERT_CLAUSE}
+        RETURNING id, sheet_id, row_id, voter_id, status, false AS replayed
+    )
+    SELECT r.*, {OTHER_SIGNATURES.format(alias='r')}
+    FROM recorded r;
+""")
+
+# The stored rows for entries the upsert left alone. Those written with the same
+# idempotency key are replays; any other is a conflict with a different entry.
+RECORDED_SQL = text(f"""
+    SELECT
+        c.id, c.sheet_id, c.row_id, c.voter_id, c.status,
+        k.idempotency_key IS NOT NULL AND c.idempotency_key = k.idempotency_key AS replayed,
+        {OTHER_SIGNATURES.format(alias='c')}
+    FROM signatures.collected c
+    JOIN unnest(CAST(:sheet_ids AS int[]), CAST(:row_ids AS int[]), CAST(:idempotency_keys AS text[]))
+        AS k(sheet_id, row_id, idempotency_key)
+        ON k.sheet_id = c.sheet_id AND k.row_id = c.row_id;
+""")
+
+
+def record_signature(entry, replace=False):
+    """
+    Records one signature in a single round-trip. `entry` holds the sheet and row,
+    last_4, date_collected, the voter_id if one was picked, and the name and address
+    as typed for when it doesn't match, and an optional idempotency_key. An
+    occupied row is only overwritten with `replace`. Returns (signature, conflict):
+    signature is the (id, sheet_id, row_id, voter_id, status, replayed, duplicates)
+    now in the row, where duplicates lists the voter's other signatures or is None,
+    and conflict is True when the row holds a different entry that was kept.
+    The caller commits.
+    """
+    params = {'idempotency_key': None, **entry, 'replace': replace}
+    signature = db.session.execute(RECORD_SIGNATURE_SQL, params).first()
+    if signature is not None:
+        return signature, False
+    signature = recorded_signatures([entry])[(entry['sheet_id'], entry['row_id'])]
+    return signature, not signature.replayed
+
+def recorded_signatures(entries):
+    """
+    The stored signatures in the sheet rows of `entries`, keyed by (sheet_id, row_id),
+    with replayed set where the entry's idempotency_key wrote the row.
+    """
+    params = {
+        'sheet_ids': [entry['sheet_id'] for entry in entries],
+        'row_ids': [entry['row_id'] for entry in entries],
+        'idempotency_keys': [entry.get('idempotency_key') for entry in entries]
+    }
+    return {(row.sheet_id, row.row_id): row for row in db.session.execute(RECORDED_SQL, params)}
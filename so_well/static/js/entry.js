@@ -19,7 +19,7 @@ $(document).ready(function () {
 
     $('#not-found').on('click', function () {
         console.log("Not Found clicked");
-        $('#not-found-modal').modal('show');
+        $('#not-found-modal').data('idempotencyKey', newIdempotencyKey()).modal('show');
         // Set focus to the first field when the not-found modal opens
         $('#nf-row-number').focus();
 
@@ -77,6 +77,8 @@ $(document).ready(function () {
     });
 
     $('#match-modal').on('show.bs.modal', function () {
+        // One key per entry: resubmitting after a network error or a double Enter is recorded once
+        $(this).data('idempotencyKey', newIdempotencyKey());
         const sheetNumber = $('#header-sheet-number').val();
         // Fetch the next available row number
         fetchNextAvailableRowNumber(sheetNumber, '#row-number');
@@ -117,7 +119,8 @@ $(document).ready(function () {
             row_number: $('#row-number').val(),
             date_collected: $('#date-collected').val(),
             last_four_ssn: $('#last-4').val(),
-            voter_id: voterData.voter_id
+            voter_id: voterData.voter_id,
+            idempotency_key: $('#match-modal').data('idempotencyKey')
         };
         console.log("Match form submitted", formData);
         $.ajax({
@@ -136,6 +139,7 @@ $(document).ready(function () {
             },
             error: function(xhr, status, error) {
                 console.error('Error recording match:', error);
+                showNotification(`Error: ${(xhr.responseJSON && xhr.responseJSON.error) || error || 'Network error — retry'}`, 'danger');
             }
         });
     }
@@ -153,7 +157,8 @@ $(document).ready(function () {
             city: $('#nf-city').val(),
             state: $('#nf-state').val(),
             zip_code: $('#nf-zip-code').val(),
-            last_four_ssn: $('#nf-last-4').val()
+            last_four_ssn: $('#nf-last-4').val(),
+            idempotency_key: $('#not-found-modal').data('idempotencyKey')
         };
 
         console.log("Submitting Not Found form with formData:", formData);
@@ -174,7 +179,7 @@ $(document).ready(function () {
             },
             error: function (xhr, status, error) {
                 console.error('Error recording Not Found:', error);
-                showNotification(`Error: ${xhr.responseJSON.error}`, 'danger');
+                showNotification(`Error: ${(xhr.responseJSON && xhr.responseJSON.error) || error || 'Network error — retry'}`, 'danger');
             }
         });
     });
@@ -377,6 +382,14 @@ $(document).ready(function () {
         $('#nf-date-signed').val($('#header-year').val() + '-' + $('#header-month').val().padStart(2, '0') + '-01');
     }
 
+    function newIdempotencyKey() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        // crypto.randomUUID needs a secure context; fall back for plain http
+        return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+    }
+
     function prepopulateDateFields() {
         let current_date = new Date();
         $('#header-month').val(('0' + (current_date.getMonth() + 1)).slice(-2));
@@ -0,0 +1,199 @@
+# so_well/utils/benchmark.py
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from sqlalchemy import text
+from so_well.models import db
+from .loader import LOAD_MODES
+from .logging import logger
+from .synthetic import generate_voter_file, parse_size
+
+BENCHMARK_DIR = 'data/benchmark'
+RESULTS_FILE = 'logs/loader-benchmark.jsonl'  # One JSON result per line, appended across runs
+DEFAULT_SIZES = ('10k', '1m', '8m')
+RSS_SAMPLE_INTERVAL = 0.1  # Seconds between samples of the loader's process tree RSS
+
+COUNT_SIGNATURES_SQL = text("SELECT count(*) FROM signatures.collected;")
+
+# Everything a load writes. Collected signatures reference voters, so they go too, with
+# their counters: TRUNCATE doesn't fire the triggers that keep collected_count in step.
+# No CASCADE, so a table that starts referencing these fails the reset instead.
+RESET_SQL = text("""
+    TRUNCATE electorate.voters, electorate.address, electorate.locality,
+        meta.voter_fingerprint, meta.load_run, meta.load_checkpoint,
+        signatures.collected, signatures.collected_count
+    RESTART IDENTITY;
+""")
+
+
+def voter_file(size, seed=0):
+    """Returns the synthetic voter file for `size`, generating it on first use."""
+    path = os.path.join(BENCHMARK_DIR, f"voters-{size.lower()}-seed{seed}.csv")
+    if not os.path.exists(path):
+        generate_voter_file(path, parse_size(size), seed)
+    return path
+
+def reset_tables(destroy_signatures=False):
+    """
+    Empties the electorate tables so each run loads into the same starting state.
+    Refuses while signatures.collected has rows unless `destroy_signatures` is set.
+    """
+    with db.engine.begin() as connection:
+        signatures = connection.execute(COUNT_SIGNATURES_SQL).scalar()
+        if signatures and not destroy_signatures:
+            raise ValueError(
+                f"signatures.collected has {signatures} rows; resetting would delete them. "
+                "Pass --destroy-signatures if this is a benchmark database."
+            )
+        connection.execute(RESET_SQL)
+    logger.info("Benchmark tables reset")
+
+def process_rss_kb(pid):
+    """Resident set size of one process in kilobytes, or 0 once it has gone."""
+    try:
+        with open(f'/proc/{pid}/status', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+def tree_rss_kb(pid):
+    """Summed RSS of `pid` and all its descendants, from /proc (Linux; 0 elsewhere)."""
+    children = {}
+    try:
+        entries = [entry for entry in os.listdir('/proc') if entry.isdigit()]
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            with open(f'/proc/{entry}/stat', encoding='utf-8') as f:
+                # The command name is parenthesized and may hold spaces; ppid follows state
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        total += process_rss_kb(current)
+        pending.extend(children.get(current, ()))
+    return total
+
+def run_loader(file_path, mode, metrics_file, bulk=False):
+    """
+    Runs one load in a child process and returns its exit status, wall time, peak
+    RSS of its whole process tree and the largest RSS of any single process in it,
+    both in MB. The tree total is sampled every RSS_SAMPLE_INTERVAL seconds and counts
+    pages shared between processes once per process. wait4's ru_maxrss only gives the
+    single-process figure, which understates parallel mode by about the worker count.
+    """
+    command = [sys.executable, '-m', 'so_well.utils.loader', file_path, '--mode', mode, '--metrics-file', metrics_file]
+    if bulk:
+        command.append('--bulk')
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command)
+    peak_tree_kb = 0
+    while True:
+        pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+        if pid:
+            break
+        peak_tree_kb = max(peak_tree_kb, tree_rss_kb(process.pid))
+        time.sleep(RSS_SAMPLE_INTERVAL)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux; a spike between samples can still exceed the tree total
+    max_process_kb = usage.ru_maxrss
+    return process.returncode, elapsed, max(peak_tree_kb, max_process_kb) / 1024, max_process_kb / 1024
+
+def run_benchmark(sizes=DEFAULT_SIZES, modes=LOAD_MODES, results_file=RESULTS_FILE, reset=False, bulk=False, seed=0, destroy_signatures=False):
+    """
+    Loads a synthetic voter file of each size in each mode and appends one result
+    per run (rows/sec, peak RSS of the loader's process tree and of its largest
+    process, DB round-trips and the full metrics summary) to
+    `results_file`. Without `reset` every run after the first loads into tables
+    that already hold the data, which measures a reload rather than a fresh load.
+    `destroy_signatures` lets `reset` empty signatures.collected as well.
+    """
+    os.makedirs(os.path.dirname(results_file) or '.', exist_ok=True)
+    results = []
+
+    for size in sizes:
+        file_path = voter_file(size, seed)
+        for mode in modes:
+            if reset:
+                reset_tables(destroy_signatures)
+
+            metrics_file = os.path.join(BENCHMARK_DIR, f"metrics-{size.lower()}-{mode}.json")
+            if os.path.exists(metrics_file):
+                os.remove(metrics_file)
+
+            logger.info(f"Benchmarking {mode} mode on {file_path}")
+            exit_code, elapsed, peak_rss_mb, max_process_rss_mb = run_loader(file_path, mode, metrics_file, bulk)
+
+            summary = {}
+            if os.path.exists(metrics_file):
+                with open(metrics_file, encoding='utf-8') as f:
+                    summary = json.load(f)
+
+            result = {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'size': size,
+                'rows': parse_size(size),
+                'seed': seed,
+                'mode': mode,
+                'bulk': bulk,
+                'reset': reset,
+                'exit_code': exit_code,
+                'wall_seconds': round(elapsed, 3),
+                'rows_per_second': summary.get('rows_per_second'),
+                'peak_rss_mb': round(peak_rss_mb, 1),
+                'max_process_rss_mb': round(max_process_rss_mb, 1),
+                'round_trips': summary.get('round_trips'),
+                'round_trips_per_batch': summary.get('round_trips_per_batch'),
+                'metrics': summary
+            }
+            with open(results_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result) + '\n')
+            results.append(result)
+
+            logger.info(
+                f"Benchmark {size} {mode} - Rows/sec: {result['rows_per_second']}, Peak RSS: {result['peak_rss_mb']} MB "
+                f"(largest process {result['max_process_rss_mb']} MB), "
+                f"Round-trips: {result['round_trips']}, Wall: {result['wall_seconds']}s, Exit: {exit_code}"
+            )
+
+    logger.info(f"Benchmark results appended to {results_file}")
+    return results
+
+if __name__ == "__main__":
+    from so_well import begin_era
+
+    parser = argparse.ArgumentParser(description="Benchmark the voter file loader against synthetic voter files.")
+    parser.add_argument('--sizes', default=','.join(DEFAULT_SIZES), help="Comma-separated row counts, e.g. 10k,1m,8m")
+    parser.add_argument('--modes', default=','.join(LOAD_MODES), help=f"Comma-separated loader modes from {', '.join(LOAD_MODES)}")
+    parser.add_argument('--results-file', default=RESULTS_FILE)
+    parser.add_argument('--reset', action='store_true', help="Truncate the electorate tables before every run (benchmark databases only)")
+    parser.add_argument('--destroy-signatures', action='store_true', help="Let --reset delete collected signatures (benchmark databases only)")
+    parser.add_argument('--bulk', action='store_true', help="Pass --bulk to the loader")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    unknown = [mode for mode in modes if mode not in LOAD_MODES]
+    if unknown:
+        parser.error(f"Unknown load modes {unknown}, expected some of {LOAD_MODES}")
+
+    app = begin_era()
+    with app.app_context():
+        run_benchmark(
+            [size.strip() for size in args.sizes.split(',') if size.strip()], modes,
+            args.results_file, args.reset, args.bulk, args.seed, args.destroy_signatures
+        )
@@ -0,0 +1,207 @@
+# so_well/utils/bulk.py
+import csv
+import io
+from itertools import islice
+from so_well.models import db
+from .logging import logger
+from .metrics import LoadMetrics
+from .normalize import DATE_FIELDS, TEXT_FIELDS, clean_date, clean_text
+
+COPY_BATCH_SIZE = 250000  # Rows staged per COPY before resolving and committing
+
+# Columns of the voter file the loader uses, in staging table order
+SOURCE_COLUMNS = [
+    'IDENTIFICATION_NUMBER', 'LAST_NAME', 'FIRST_NAME', 'MIDDLE_NAME', 'SUFFIX', 'GENDER',
+    'DOB', 'REGISTRATION_DATE', 'EFFECTIVE_DATE', 'STATUS',
+    'HOUSE_NUMBER', 'HOUSENUMBERSUFFIX', 'STREET_NAME', 'STREETTYPECODENAME', 'DIRECTION',
+    'POST_DIRECTION', 'APT_NUM', 'CITY', 'STATE', 'ZIP',
+    'LOCALITY_CODE', 'LOCALITYNAME', 'PRECINCT_CODE_VALUE', 'PRECINCTNAME',
+    'MAILING_ADDRESS_LINE_1'
+]
+
+STAGING_TABLE = 'voter_staging'
+
+CREATE_STAGING_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+        {', '.join(f'{column.lower()} text' for column in SOURCE_COLUMNS)}
+    ) ON COMMIT PRESERVE ROWS;
+"""
+
+# NULL is set to a marker that never appears so empty fields stay '' like the ORM loader
+COPY_SQL = f"""
+    COPY {STAGING_TABLE} ({', '.join(column.lower() for column in SOURCE_COLUMNS)})
+    FROM STDIN WITH (FORMAT csv, NULL '\\N')
+"""
+
+# Resolution statements take the table they read from as {source}
+RESOLVE_LOCALITIES_SQL = """
+    INSERT INTO electorate.locality (locality_code, locality_name, precinct_code, precinct_name, created_at, updated_at)
+    SELECT DISTINCT locality_code, localityname, precinct_code_value, precinctname, now(), now()
+    FROM {source}
+    ON CONFLICT (locality_code, locality_name, precinct_code, precinct_name) DO NOTHING;
+"""
+
+RESOLVE_ADDRESSES_SQL = """
+    INSERT INTO electorate.address (
+        house_number, house_number_suffix, street_name, street_type, direction,
+        post_direction, apt_num, city, state, zip, created_at, updated_at
+    )
+    SELECT DISTINCT
+        house_number, housenumbersuffix, street_name, streettypecodename, direction,
+        post_direction, apt_num, city, state, zip, now(), now()
+    FROM {source}
+    ON CONFLICT (
+        house_number, house_number_suffix, street_name, street_type, direction,
+        post_direction, apt_num, city, state, zip
+    ) DO NOTHING;
+"""
+
+# The voter file only has MAILING_ADDRESS_LINE_1, not the structured parts an address row
+# needs, so mailing_address_id is left NULL rather than pointing at the residence.
+RESOLVE_VOTERS_SQL = """
+    INSERT INTO electorate.voters (
+        identification_number, last_name, first_name, middle_name, suffix, gender,
+        dob, registration_date, effective_date, status,
+        residence_address_id, mailing_address_id, locality_id, created_at, updated_at
+    )
+    SELECT DISTINCT ON (s.identification_number)
+        s.identification_number, s.last_name, s.first_name, s.middle_name, s.suffix, s.gender,
+        to_date(NULLIF(s.dob, ''), 'MM/DD/YYYY'),
+        to_date(NULLIF(s.registration_date, ''), 'MM/DD/YYYY'),
+        to_date(NULLIF(s.effective_date, ''), 'MM/DD/YYYY'),
+        s.status,
+        a.id,
+        NULL,
+        l.id,
+        now(), now()
+    FROM {source} s
+    JOIN electorate.address a ON
+        a.house_number = s.house_number
+        AND a.house_number_suffix = s.housenumbersuffix
+        AND a.street_name = s.street_name
+        AND a.street_type = s.streettypecodename
+        AND a.direction = s.direction
+        AND a.post_direction = s.post_direction
+        AND a.apt_num = s.apt_num
+        AND a.city = s.city
+        AND a.state = s.state
+        AND a.zip = s.zip
+    JOIN electorate.locality l ON
+        l.locality_code = s.locality_code
+        AND l.locality_name = s.localityname
+        AND l.precinct_code = s.precinct_code_value
+        AND l.precinct_name = s.precinctname
+    ORDER BY s.identification_number
+    ON CONFLICT (identification_number) {on_conflict};
+"""
+
+
+VOTER_SKIP_EXISTING = "DO NOTHING"
+
+
+class CsvStream:
+    """
+    File-like adapter that renders an iterator of row dicts as CSV on demand,
+    so COPY can stream rows without materializing the batch. Name and address
+    fields are normalized and unparseable dates blanked the same way as in the
+    batch loader, so a bad date loads as NULL instead of aborting the COPY.
+    """
+
+    def __init__(self, rows, columns=SOURCE_COLUMNS):
+        self.rows = iter(rows)
+        self.columns = columns
+        self.text_positions = [i for i, column in enumerate(columns) if column in TEXT_FIELDS]
+        self.date_positions = [i for i, column in enumerate(columns) if column in DATE_FIELDS]
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+        self.pending = ''
+        self.count = 0
+
+    def read(self, size=-1):
+        while size < 0 or len(self.pending) < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            values = [row.get(column) or '' for column in self.columns]
+            for i in self.text_positions:
+                values[i] = clean_text(values[i])
+            for i in self.date_positions:
+                values[i] = clean_date(values[i])
+            self.writer.writerow(values)
+            self.count += 1
+            self.pending += self.buffer.getvalue()
+            self.buffer.seek(0)
+            self.buffer.truncate()
+
+        if size < 0:
+            chunk, self.pending = self.pending, ''
+        else:
+            chunk, self.pending = self.pending[:size], self.pending[size:]
+        return chunk
+
+
+def resolve_staged(cursor, source, on_conflict):
+    """
+    Resolves localities, addresses and voters from a staged table. Returns the
+    number of rows each statement wrote.
+    """
+    cursor.execute(RESOLVE_LOCALITIES_SQL.format(source=source))
+    localities = cursor.rowcount
+    cursor.execute(RESOLVE_ADDRESSES_SQL.format(source=source))
+    addresses = cursor.rowcount
+    cursor.execute(RESOLVE_VOTERS_SQL.format(source=source, on_conflict=on_conflict))
+    return localities, addresses, cursor.rowcount
+
+
+def bulk_load(rows, batch_size=COPY_BATCH_SIZE, checkpoint=None, metrics=None):
+    """
+    Streams rows into a temporary staging table with COPY FROM STDIN and resolves
+    localities, addresses and voters with set-based INSERT ... SELECT ... ON CONFLICT.
+    Each staged batch is committed on its own; `checkpoint`, if given, is called with
+    the cursor's execute just before each commit. Returns totals for the run.
+    """
+    totals = {'rows': 0, 'localities': 0, 'addresses': 0, 'voters': 0}
+    metrics = metrics or LoadMetrics('copy')
+    rows = metrics.timed_rows(rows)
+
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(CREATE_STAGING_SQL)
+
+        while True:
+            stream = CsvStream(islice(rows, batch_size))
+            # COPY time includes the parse time pulled through the stream
+            with metrics.stage('copy'):
+                cursor.copy_expert(COPY_SQL, stream)
+            metrics.round_trip()
+            if stream.count == 0:
+                break
+
+            with metrics.stage('insert'):
+                localities, addresses, voters = resolve_staged(cursor, STAGING_TABLE, VOTER_SKIP_EXISTING)
+                cursor.execute(f"TRUNCATE {STAGING_TABLE};")
+            metrics.round_trip(4)
+            totals['localities'] += localities
+            totals['addresses'] += addresses
+            totals['voters'] += voters
+            if checkpoint:
+                checkpoint(cursor.execute)
+                metrics.round_trip()
+            with metrics.stage('commit'):
+                connection.commit()
+            metrics.round_trip()
+
+            totals['rows'] += stream.count
+            metrics.count('inserted_localities', localities)
+            metrics.count('inserted_addresses', addresses)
+            metrics.count('inserted_voters', voters)
+            metrics.batch_done(stream.count)
+            logger.info(f"Bulk batch committed - Rows: {totals['rows']}, Inserted Localities: {totals['localities']}, Inserted Addresses: {totals['addresses']}, Inserted Voters: {totals['voters']}")
+
+        return totals
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
@@ -0,0 +1,86 @@
+# so_well/utils/cache.py
+from so_well.models import Address, Locality
+from .logging import logger
+
+WARM_FETCH_SIZE = 50000  # Rows streamed per fetch while pre-warming
+
+# Natural keys: (model column, voter file column)
+ADDRESS_KEY = (
+    ('house_number', 'HOUSE_NUMBER'),
+    ('house_number_suffix', 'HOUSENUMBERSUFFIX'),
+    ('street_name', 'STREET_NAME'),
+    ('street_type', 'STREETTYPECODENAME'),
+    ('direction', 'DIRECTION'),
+    ('post_direction', 'POST_DIRECTION'),
+    ('apt_num', 'APT_NUM'),
+    ('city', 'CITY'),
+    ('state', 'STATE'),
+    ('zip', 'ZIP')
+)
+
+LOCALITY_KEY = (
+    ('locality_code', 'LOCALITY_CODE'),
+    ('locality_name', 'LOCALITYNAME'),
+    ('precinct_code', 'PRECINCT_CODE_VALUE'),
+    ('precinct_name', 'PRECINCTNAME')
+)
+
+
+class KeyCache:
+    """
+    Maps a natural-key tuple to its primary key id. Ids added during a batch are
+    held as pending until the batch commits, so a rolled-back batch never leaves
+    ids behind that do not exist in the database.
+    """
+
+    def __init__(self, model, key):
+        self.model = model
+        self.columns = [column for column, _ in key]
+        self.fields = [field for _, field in key]
+        self.ids = {}
+        self.pending = {}
+        self.warm = False
+
+    def row_key(self, row):
+        return tuple(row[field] for field in self.fields)
+
+    def prewarm(self, session):
+        """Loads every existing key with one streamed SELECT."""
+        query = session.query(self.model.id, *[getattr(self.model, column) for column in self.columns])
+        for record in query.yield_per(WARM_FETCH_SIZE):
+            self.ids[tuple(record[1:])] = record[0]
+        self.warm = True
+        logger.info(f"Pre-warmed {self.model.__tablename__} cache with {len(self.ids)} keys")
+
+    def get(self, key):
+        return self.pending.get(key) or self.ids.get(key)
+
+    def add(self, key, record_id):
+        self.pending[key] = record_id
+
+    def commit(self):
+        self.ids.update(self.pending)
+        self.pending = {}
+
+    def rollback(self):
+        self.pending = {}
+
+
+class LoaderCache:
+    """Address and locality key caches shared across the batches of one load."""
+
+    def __init__(self):
+        self.addresses = KeyCache(Address, ADDRESS_KEY)
+        self.localities = KeyCache(Locality, LOCALITY_KEY)
+
+    def prewarm(self, session):
+        self.addresses.prewarm(session)
+        self.localities.prewarm(session)
+
+    def commit(self):
+        self.addresses.commit()
+        self.localities.commit()
+
+    def rollback(self):
+        self.addresses.rollback()
+        self.localities.rollback()
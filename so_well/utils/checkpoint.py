@@ -0,0 +1,87 @@
+# so_well/utils/checkpoint.py
+from sqlalchemy import text
+from so_well.models import db
+from .logging import logger
+
+# Executed inside the batch's own transaction, through either a DBAPI cursor or
+# Connection.exec_driver_sql, so it uses the driver's pyformat parameters.
+RECORD_CHECKPOINT_SQL = """
+    INSERT INTO meta.load_checkpoint (run_id, batch_id, row_number, byte_offset)
+    VALUES (%(run_id)s, %(batch_id)s, %(row_number)s, %(byte_offset)s);
+"""
+
+START_RUN_SQL = text("""
+    INSERT INTO meta.load_run (file_path, mode, status)
+    VALUES (:file_path, :mode, 'Running')
+    RETURNING id;
+""")
+
+# Latest unfinished run for the file and its last committed batch, if any
+RESUMABLE_RUN_SQL = text("""
+    SELECT r.id, c.batch_id, c.row_number, c.byte_offset
+    FROM meta.load_run r
+    LEFT JOIN LATERAL (
+        SELECT batch_id, row_number, byte_offset
+        FROM meta.load_checkpoint
+        WHERE run_id = r.id
+        ORDER BY batch_id DESC
+        LIMIT 1
+    ) c ON TRUE
+    WHERE r.file_path = :file_path AND r.mode = :mode AND r.status <> 'Complete'
+    ORDER BY r.started_at DESC
+    LIMIT 1;
+""")
+
+RESUME_RUN_SQL = text("UPDATE meta.load_run SET status = 'Running', finished_at = NULL WHERE id = :run_id;")
+
+FINISH_RUN_SQL = text("UPDATE meta.load_run SET status = :status, finished_at = now() WHERE id = :run_id;")
+
+
+class LoadRun:
+    """
+    A load of one file, recorded in meta.load_run. Every committed batch records a
+    checkpoint (batch id, row number, byte offset) so an interrupted run can pick
+    up at the last committed offset.
+    """
+
+    def __init__(self, file_path, mode):
+        self.file_path = file_path
+        self.mode = mode
+        self.run_id = None
+        self.batch_id = 0
+        self.row_number = 0
+        self.byte_offset = 0
+
+    def start(self, resume=False):
+        params = {'file_path': self.file_path, 'mode': self.mode}
+        with db.engine.begin() as connection:
+            previous = connection.execute(RESUMABLE_RUN_SQL, params).first() if resume else None
+            if previous:
+                self.run_id = previous[0]
+                self.batch_id = previous[1] or 0
+                self.row_number = previous[2] or 0
+                self.byte_offset = previous[3] or 0
+                connection.execute(RESUME_RUN_SQL, {'run_id': self.run_id})
+                logger.info(f"Resuming load run {self.run_id} after batch {self.batch_id} (row {self.row_number}, byte {self.byte_offset})")
+            else:
+                if resume:
+                    logger.info(f"No unfinished load run for {self.file_path}, starting from the beginning")
+                self.run_id = connection.execute(START_RUN_SQL, params).scalar()
+                logger.info(f"Started load run {self.run_id}")
+
+    def checkpoint(self, execute, row_number, byte_offset):
+        """Records the next batch through `execute`, inside the caller's transaction."""
+        self.batch_id += 1
+        self.row_number = row_number
+        self.byte_offset = byte_offset
+        execute(RECORD_CHECKPOINT_SQL, {
+            'run_id': self.run_id,
+            'batch_id': self.batch_id,
+            'row_number': row_number,
+            'byte_offset': byte_offset
+        })
+
+    def finish(self, status='Complete'):
+        with db.engine.begin() as connection:
+            connection.execute(FINISH_RUN_SQL, {'run_id': self.run_id, 'status': status})
+        logger.info(f"Load run {self.run_id} finished with status {status}")
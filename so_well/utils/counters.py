@@ -0,0 +1,87 @@
+# so_well/utils/counters.py
+import argparse
+from sqlalchemy import text
+from so_well.models import db
+from .logging import logger
+
+# Kept by the count_collected triggers on signatures.collected, per status for
+# scope 'total' (scope_key ''), 'sheet' (the sheet id) and 'day' (date_collected)
+COUNTS_SQL = text("""
+    SELECT status, count
+    FROM signatures.collected_count
+    WHERE scope = :scope AND scope_key = :scope_key AND count <> 0;
+""")
+
+# Counters as they would be if rebuilt from scratch, next to what is stored
+DRIFT_SQL = text("""
+    WITH expected AS (
+        SELECT s.scope, s.scope_key, r.status, count(*) AS count
+        FROM signatures.collected r
+        CROSS JOIN LATERAL (VALUES ('total', ''), ('sheet', r.sheet_id::text), ('day', r.date_collected::text))
+            AS s(scope, scope_key)
+        GROUP BY s.scope, s.scope_key, r.status
+    )
+    SELECT
+        scope, scope_key, status,
+        COALESCE(c.count, 0) AS stored, COALESCE(e.count, 0) AS expected
+    FROM signatures.collected_count c
+    FULL JOIN expected e USING (scope, scope_key, status)
+    WHERE COALESCE(c.count, 0) <> COALESCE(e.count, 0)
+    ORDER BY scope, scope_key, status;
+""")
+
+# Blocks signature writes, not reads, until the rebuild commits
+LOCK_COLLECTED_SQL = text("LOCK TABLE signatures.collected IN SHARE MODE;")
+
+FIX_DRIFT_SQL = text("""
+    INSERT INTO signatures.collected_count AS c (scope, scope_key, status, count)
+    SELECT * FROM unnest(
+        CAST(:scopes AS text[]), CAST(:scope_keys AS text[]), CAST(:statuses AS text[]), CAST(:counts AS bigint[])
+    )
+    ON CONFLICT (scope, scope_key, status)
+    DO UPDATE SET count = EXCLUDED.count, updated_at = now();
+""")
+
+
+def signature_counts(scope='total', scope_key=''):
+    """Signatures per status for one counter scope: overall, a sheet id or a collection date."""
+    rows = db.session.execute(COUNTS_SQL, {'scope': scope, 'scope_key': str(scope_key)})
+    return {row.status: row.count for row in rows}
+
+def reconcile_counters(fix=True):
+    """
+    Recounts signatures.collected from scratch and compares the result with the
+    incrementally maintained counters. Drift is logged and, with `fix`, corrected
+    in place. Returns the drifted counters.
+    """
+    with db.engine.begin() as connection:
+        if fix:
+            connection.execute(LOCK_COLLECTED_SQL)
+        drift = [dict(row) for row in connection.execute(DRIFT_SQL).mappings()]
+
+        for counter in drift:
+            logger.warning(
+                f"Signature counter drift: {counter['scope']} {counter['scope_key'] or '-'} {counter['status']} "
+                f"stored {counter['stored']}, expected {counter['expected']}"
+            )
+        if fix and drift:
+            connection.execute(FIX_DRIFT_SQL, {
+                'scopes': [counter['scope'] for counter in drift],
+                'scope_keys': [counter['scope_key'] for counter in drift],
+                'statuses': [counter['status'] for counter in drift],
+                'counts': [counter['expected'] for counter in drift]
+            })
+
+    logger.info(f"Signature counters reconciled: {len(drift)} drifted" + (" and fixed" if fix and drift else ""))
+    return drift
+
+if __name__ == "__main__":
+    from so_well import begin_era
+
+    parser = argparse.ArgumentParser(description="Rebuild the signature counters from signatures.collected and report drift.")
+    parser.add_argument('--check', action='store_true', help="Only report drift, don't correct it")
+    args = parser.parse_args()
+
+    app = begin_era()
+    with app.app_context():
+        reconcile_counters(fix=not args.check)
@@ -0,0 +1,93 @@
+# so_well/utils/deferral.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import text
+from so_well.models import db
+from .logging import logger
+
+DEFERRED_TABLES = ('electorate.voters', 'electorate.address', 'electorate.locality')
+
+REBUILD_WORKERS = 4  # Index builds running at once, each on its own connection
+REBUILD_MAINTENANCE_WORK_MEM = '1GB'
+REBUILD_PARALLEL_WORKERS = 4  # max_parallel_maintenance_workers per build
+
+# Secondary indexes only: primary keys and unique indexes stay, the loader's
+# ON CONFLICT and foreign keys depend on them. Tables are matched by oid and names
+# are schema-qualified by hand, since regclass text drops the schema of anything on
+# the search_path.
+SECONDARY_INDEXES_SQL = text("""
+    SELECT quote_ident(n.nspname) || '.' || quote_ident(ic.relname) AS index_name,
+        quote_ident(n.nspname) || '.' || quote_ident(c.relname) AS table_name,
+        pg_get_indexdef(i.indexrelid) AS definition
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indrelid
+    JOIN pg_class ic ON ic.oid = i.indexrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE c.oid = ANY(CAST(:tables AS regclass[]))
+        AND NOT i.indisprimary
+        AND NOT i.indisunique;
+""")
+
+SAVE_INDEX_SQL = text("""
+    INSERT INTO meta.deferred_index (index_name, table_name, definition)
+    VALUES (:index_name, :table_name, :definition)
+    ON CONFLICT (index_name) DO NOTHING;
+""")
+
+DEFERRED_INDEXES_SQL = text("SELECT index_name, definition FROM meta.deferred_index ORDER BY table_name, index_name;")
+
+DELETE_DEFERRED_INDEX_SQL = text("DELETE FROM meta.deferred_index WHERE index_name = :index_name;")
+
+
+def defer_indexes():
+    """
+    Prepares the electorate tables for a bulk load: records and drops every
+    secondary index and disables user triggers (the updated_at triggers). The
+    definitions are kept in meta.deferred_index, so they can be rebuilt even if
+    the load dies before restore_indexes runs.
+    """
+    with db.engine.begin() as connection:
+        indexes = connection.execute(SECONDARY_INDEXES_SQL, {'tables': list(DEFERRED_TABLES)}).mappings().all()
+        for index in indexes:
+            connection.execute(SAVE_INDEX_SQL, dict(index))
+            connection.execute(text(f"DROP INDEX IF EXISTS {index['index_name']};"))
+            logger.info(f"Deferred index {index['index_name']} on {index['table_name']}")
+
+        for table in DEFERRED_TABLES:
+            connection.execute(text(f"ALTER TABLE {table} DISABLE TRIGGER USER;"))
+        logger.info(f"Disabled triggers on {', '.join(DEFERRED_TABLES)}")
+
+
+def rebuild_index(engine, index_name, definition):
+    """Builds one deferred index on its own connection and forgets it once built."""
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        connection.execute(text(f"SET LOCAL maintenance_work_mem = '{REBUILD_MAINTENANCE_WORK_MEM}';"))
+        connection.execute(text(f"SET LOCAL max_parallel_maintenance_workers = {int(REBUILD_PARALLEL_WORKERS)};"))
+        connection.execute(text(definition.replace('CREATE INDEX ', 'CREATE INDEX IF NOT EXISTS ', 1)))
+        connection.execute(DELETE_DEFERRED_INDEX_SQL, {'index_name': index_name})
+    logger.info(f"Rebuilt index {index_name} in {time.perf_counter() - start:.1f}s")
+
+
+def restore_indexes():
+    """
+    Re-enables triggers, rebuilds every deferred index concurrently (Postgres also
+    parallelizes each btree build) and analyzes the tables. The loader refreshes
+    electorate.voter_lookup afterwards.
+    """
+    with db.engine.begin() as connection:
+        for table in DEFERRED_TABLES:
+            connection.execute(text(f"ALTER TABLE {table} ENABLE TRIGGER USER;"))
+        indexes = connection.execute(DEFERRED_INDEXES_SQL).all()
+    logger.info(f"Enabled triggers, rebuilding {len(indexes)} deferred indexes")
+
+    # Worker threads have no app context, so they get the engine itself
+    engine = db.engine
+    with ThreadPoolExecutor(max_workers=REBUILD_WORKERS) as pool:
+        for future in [pool.submit(rebuild_index, engine, index_name, definition) for index_name, definition in indexes]:
+            future.result()
+
+    with db.engine.connect() as connection:
+        connection.execution_options(isolation_level='AUTOCOMMIT')
+        for table in DEFERRED_TABLES:
+            connection.execute(text(f"ANALYZE {table};"))
@@ -0,0 +1,170 @@
+# so_well/utils/delta.py
+from so_well.models import db
+from .bulk import (
+    SOURCE_COLUMNS, STAGING_TABLE, CREATE_STAGING_SQL, COPY_SQL, CsvStream, resolve_staged
+)
+from .logging import logger
+
+DELTA_TABLE = 'voter_delta'
+CHANGES_TABLE = 'voter_changes'
+REMOVALS_TABLE = 'voter_removals'
+
+# Status kept on removed voters that still have collected signatures pointing at them
+REMOVED_STATUS = 'Removed'
+
+# Largest share of electorate.voters a delta may remove without --allow-mass-removal;
+# more than that usually means a truncated or partly rejected file
+MAX_REMOVAL_FRACTION = 0.05
+
+# One fingerprint per voter: md5 over every loaded column of its source row
+FINGERPRINT_SQL = "md5(concat_ws(E'\\x1f', {columns}))".format(
+    columns=', '.join(column.lower() for column in SOURCE_COLUMNS)
+)
+
+CREATE_DELTA_SQL = f"""
+    CREATE TEMP TABLE {DELTA_TABLE} ON COMMIT DROP AS
+    SELECT DISTINCT ON (identification_number) *, {FINGERPRINT_SQL} AS fingerprint
+    FROM {STAGING_TABLE}
+    ORDER BY identification_number;
+    CREATE UNIQUE INDEX ON {DELTA_TABLE} (identification_number);
+    ANALYZE {DELTA_TABLE};
+"""
+
+# Rows whose fingerprint is new or different; 'insert' when the voter does not exist yet
+CREATE_CHANGES_SQL = f"""
+    CREATE TEMP TABLE {CHANGES_TABLE} ON COMMIT DROP AS
+    SELECT d.*, CASE WHEN v.identification_number IS NULL THEN 'insert' ELSE 'update' END AS change
+    FROM {DELTA_TABLE} d
+    LEFT JOIN meta.voter_fingerprint f ON f.identification_number = d.identification_number
+    LEFT JOIN electorate.voters v ON v.identification_number = d.identification_number
+    WHERE f.fingerprint IS DISTINCT FROM d.fingerprint;
+"""
+
+CREATE_REMOVALS_SQL = f"""
+    CREATE TEMP TABLE {REMOVALS_TABLE} ON COMMIT DROP AS
+    SELECT v.identification_number
+    FROM electorate.voters v
+    WHERE NOT EXISTS (
+        SELECT 1 FROM {DELTA_TABLE} d WHERE d.identification_number = v.identification_number
+    );
+"""
+
+COUNT_REMOVALS_SQL = f"""
+    SELECT (SELECT count(*) FROM {REMOVALS_TABLE}), (SELECT count(*) FROM electorate.voters);
+"""
+
+COUNT_CHANGES_SQL = f"""
+    SELECT
+        count(*) FILTER (WHERE change = 'insert'),
+        count(*) FILTER (WHERE change = 'update'),
+        (SELECT count(*) FROM {DELTA_TABLE})
+    FROM {CHANGES_TABLE};
+"""
+
+VOTER_UPSERT = """DO UPDATE SET
+        last_name = EXCLUDED.last_name,
+        first_name = EXCLUDED.first_name,
+        middle_name = EXCLUDED.middle_name,
+        suffix = EXCLUDED.suffix,
+        gender = EXCLUDED.gender,
+        dob = EXCLUDED.dob,
+        registration_date = EXCLUDED.registration_date,
+        effective_date = EXCLUDED.effective_date,
+        status = EXCLUDED.status,
+        residence_address_id = EXCLUDED.residence_address_id,
+        mailing_address_id = EXCLUDED.mailing_address_id,
+        locality_id = EXCLUDED.locality_id,
+        updated_at = now()"""
+
+# Voters referenced by collected signatures are kept and flagged instead of deleted
+FLAG_REMOVED_SQL = f"""
+    UPDATE electorate.voters v
+    SET status = '{REMOVED_STATUS}'
+    FROM {REMOVALS_TABLE} r
+    WHERE v.identification_number = r.identification_number
+        AND v.status IS DISTINCT FROM '{REMOVED_STATUS}'
+        AND EXISTS (SELECT 1 FROM signatures.collected c WHERE c.voter_id = v.identification_number);
+"""
+
+DELETE_REMOVED_SQL = f"""
+    DELETE FROM electorate.voters v
+    USING {REMOVALS_TABLE} r
+    WHERE v.identification_number = r.identification_number
+        AND NOT EXISTS (SELECT 1 FROM signatures.collected c WHERE c.voter_id = v.identification_number);
+"""
+
+DELETE_REMOVED_FINGERPRINTS_SQL = f"""
+    DELETE FROM meta.voter_fingerprint f
+    USING {REMOVALS_TABLE} r
+    WHERE f.identification_number = r.identification_number;
+"""
+
+UPSERT_FINGERPRINTS_SQL = f"""
+    INSERT INTO meta.voter_fingerprint (identification_number, fingerprint, updated_at)
+    SELECT identification_number, fingerprint, now()
+    FROM {CHANGES_TABLE}
+    ON CONFLICT (identification_number) DO UPDATE SET
+        fingerprint = EXCLUDED.fingerprint,
+        updated_at = EXCLUDED.updated_at;
+"""
+
+
+def delta_load(rows, allow_mass_removal=False):
+    """
+    Applies a full voter file as a delta. Every row is staged with COPY and
+    fingerprinted; only rows whose fingerprint is new or changed are upserted, and
+    voters missing from the file are removed. The whole refresh runs in one
+    transaction. An empty file, or one that would remove more than
+    MAX_REMOVAL_FRACTION of the voters (unless `allow_mass_removal`), raises
+    ValueError before anything is changed. Returns counts per change type.
+    """
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(CREATE_STAGING_SQL)
+        cursor.execute(f"TRUNCATE {STAGING_TABLE};")
+
+        stream = CsvStream(rows)
+        cursor.copy_expert(COPY_SQL, stream)
+        logger.info(f"Staged {stream.count} rows for delta refresh")
+        if stream.count == 0:
+            raise ValueError("Delta file has no valid rows; refusing to remove every voter")
+
+        cursor.execute(CREATE_DELTA_SQL)
+        cursor.execute(CREATE_CHANGES_SQL)
+        cursor.execute(CREATE_REMOVALS_SQL)
+        cursor.execute(COUNT_REMOVALS_SQL)
+        removals, voters = cursor.fetchone()
+        if voters and removals / voters > MAX_REMOVAL_FRACTION and not allow_mass_removal:
+            raise ValueError(
+                f"Delta would remove {removals} of {voters} voters (over {MAX_REMOVAL_FRACTION:.0%}); "
+                "check the file or rerun with --allow-mass-removal"
+            )
+        cursor.execute(COUNT_CHANGES_SQL)
+        inserts, updates, total = cursor.fetchone()
+
+        localities, addresses, _ = resolve_staged(cursor, CHANGES_TABLE, VOTER_UPSERT)
+        cursor.execute(FLAG_REMOVED_SQL)
+        flagged = cursor.rowcount
+        cursor.execute(DELETE_REMOVED_SQL)
+        deleted = cursor.rowcount
+        cursor.execute(DELETE_REMOVED_FINGERPRINTS_SQL)
+        cursor.execute(UPSERT_FINGERPRINTS_SQL)
+        cursor.execute(f"TRUNCATE {STAGING_TABLE};")
+        connection.commit()
+
+        return {
+            'rows': stream.count,
+            'inserted': inserts,
+            'updated': updates,
+            'unchanged': total - inserts - updates,
+            'removed': deleted,
+            'flagged_removed': flagged,
+            'localities': localities,
+            'addresses': addresses
+        }
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
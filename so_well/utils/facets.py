@@ -0,0 +1,92 @@
+# so_well/utils/facets.py
+import time
+from collections import defaultdict
+from sqlalchemy import text
+from so_well.models import db
+from .logging import logger
+
+FACET_COLUMNS = ('direction', 'post_direction', 'street_type', 'state')
+DATA_VERSION_CHECK_INTERVAL = 30  # Seconds between data version checks in each web process
+
+# One count per distinct non-null value of each facet column
+FACET_COUNTS_SQL = "\n    UNION ALL\n".join(
+    f"    SELECT '{column}', {column}, count(*) FROM electorate.address WHERE {column} IS NOT NULL GROUP BY {column}"
+    for column in FACET_COLUMNS
+)
+
+REFRESH_FACETS_SQL = [
+    text("DELETE FROM meta.address_facet;"),
+    text(f"INSERT INTO meta.address_facet (facet, value, count)\n{FACET_COUNTS_SQL};"),
+    text("UPDATE meta.data_version SET version = version + 1, loaded_at = now() WHERE id = 1;"),
+]
+
+DATA_VERSION_SQL = text("SELECT version FROM meta.data_version WHERE id = 1;")
+
+# The data version together with the last completed voter_lookup refresh: the loader
+# bumps the version before voter_lookup catches up (or while its refresh is skipped or
+# fails), so results read from the view are only current once that refresh id moves too
+CACHE_VERSION_SQL = text("""
+    SELECT
+        (SELECT version FROM meta.data_version WHERE id = 1),
+        (SELECT id FROM meta.lookup_refresh WHERE status = 'Complete' ORDER BY finished_at DESC LIMIT 1);
+""")
+
+FACETS_SQL = text("SELECT facet, value, count FROM meta.address_facet ORDER BY facet, value;")
+
+
+def refresh_facets():
+    """
+    Recomputes the address facet counts and bumps meta.data_version in one
+    transaction. Run by the loader after every load; web processes pick up the new
+    version on their next check.
+    """
+    start = time.perf_counter()
+    with db.engine.begin() as connection:
+        for statement in REFRESH_FACETS_SQL:
+            connection.execute(statement)
+        version = connection.execute(DATA_VERSION_SQL).scalar()
+    logger.info(f"Refreshed address facets for data version {version} in {time.perf_counter() - start:.1f}s")
+    return version
+
+class DataVersion:
+    """
+    Per-process view of meta.data_version and the last completed voter_lookup
+    refresh, as a (version, refresh id) pair reread at most every `check_interval`
+    seconds. Caches compare it to the version their entries were built from.
+    """
+
+    def __init__(self, check_interval=DATA_VERSION_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self.version = None
+        self.checked = 0.0
+
+    def current(self):
+        now = time.monotonic()
+        if self.version is None or now - self.checked >= self.check_interval:
+            self.version = tuple(db.session.execute(CACHE_VERSION_SQL).first())
+            self.checked = now
+        return self.version
+
+data_version = DataVersion()
+
+class FacetCache:
+    """Per-process copy of meta.address_facet, reread only when the data version changes."""
+
+    def __init__(self, versions=data_version):
+        self.versions = versions
+        self.version = None
+        self.facets = {}
+
+    def get(self, facet):
+        """Returns [{'value': ..., 'count': ...}] for one facet column."""
+        version = self.versions.current()
+        if version != self.version:
+            facets = defaultdict(list)
+            for name, value, count in db.session.execute(FACETS_SQL):
+                facets[name].append({'value': value, 'count': count})
+            self.facets = dict(facets)
+            self.version = version
+            logger.info(f"Loaded address facets for data version {version}")
+        return self.facets.get(facet, [])
+
+facet_cache = FacetCache()
@@ -0,0 +1,131 @@
+# so_well/utils/instrument.py
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from .logging import logger
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '100'))  # Queries at least this slow are captured
+EXPLAIN_SAMPLE_RATE = float(os.getenv('EXPLAIN_SAMPLE_RATE', '0.2'))  # Share of slow SELECTs re-run under EXPLAIN ANALYZE
+QUERY_LOG_SIZE = 200  # Slow queries kept per process, oldest dropped first
+EXPLAIN_WORKERS = 2  # EXPLAIN ANALYZE runs at once per process; sampled queries beyond that go unexplained
+
+
+class QueryLog:
+    """
+    Per-process query timings for requests: count, total and max latency per
+    endpoint, and a ring buffer of the slowest queries with their filter shape and,
+    when sampled, an EXPLAIN (ANALYZE, BUFFERS) plan.
+    """
+
+    def __init__(self, size=QUERY_LOG_SIZE):
+        self.slow = deque(maxlen=size)
+        self.endpoints = defaultdict(lambda: {'queries': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'slow': 0})
+        self.lock = threading.Lock()
+
+    def count(self, endpoint, elapsed_ms, slow=False):
+        with self.lock:
+            stats = self.endpoints[endpoint]
+            stats['queries'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['slow'] += int(slow)
+
+    def record(self, entry):
+        with self.lock:
+            self.slow.append(entry)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'slow_query_ms': SLOW_QUERY_MS,
+                'explain_sample_rate': EXPLAIN_SAMPLE_RATE,
+                'endpoints': {
+                    endpoint: {**stats, 'avg_ms': round(stats['total_ms'] / stats['queries'], 2)}
+                    for endpoint, stats in self.endpoints.items()
+                },
+                'slow_queries': list(reversed(self.slow))
+            }
+
+    def clear(self):
+        with self.lock:
+            self.slow.clear()
+            self.endpoints.clear()
+
+query_log = QueryLog()
+
+# Caps the extra load: a sampled query only gets a plan if a slot is free
+explain_slots = threading.BoundedSemaphore(EXPLAIN_WORKERS)
+explain_pool = ThreadPoolExecutor(max_workers=EXPLAIN_WORKERS, thread_name_prefix='explain')
+
+def explain(engine, statement, parameters, entry):
+    """
+    Re-runs a captured SELECT under EXPLAIN (ANALYZE, BUFFERS) on its own raw
+    connection, so it bypasses these events and can't disturb the request's
+    transaction. Runs in explain_pool; the plan is filled into `entry` and the
+    explain slot released when done.
+    """
+    try:
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+            entry['plan'] = cursor.fetchone()[0]
+            connection.rollback()
+        finally:
+            connection.close()
+    except Exception as e:
+        entry['plan_error'] = str(e)
+        logger.error(f"Error explaining slow query: {str(e)}")
+    finally:
+        explain_slots.release()
+
+def instrument_engine(engine, log=query_log):
+    """
+    Times every statement `engine` runs during a request. Statements slower than
+    SLOW_QUERY_MS are captured with the endpoint, the request's filter shape
+    (g.query_shape, set by the endpoint) and, for a sample of SELECTs, their plan.
+    """
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    # A failed statement never reaches after_cursor_execute; drop its start time so
+    # the next statement on the connection pops its own
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        connection = context.connection
+        if connection is not None and connection.info.get('query_start'):
+            connection.info['query_start'].pop()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info['query_start'].pop()) * 1000
+        if not has_request_context():
+            return
+
+        slow = elapsed_ms >= SLOW_QUERY_MS
+        log.count(request.endpoint, elapsed_ms, slow)
+        if not slow:
+            return
+
+        entry = {
+            'at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'endpoint': request.endpoint,
+            'latency_ms': round(elapsed_ms, 2),
+            'shape': g.get('query_shape'),
+            'statement': statement,
+            'plan': None
+        }
+        log.record(entry)
+        logger.warning(f"Slow query on {request.endpoint}: {elapsed_ms:.0f}ms, shape {entry['shape']}")
+
+        if not executemany and statement.lstrip().upper().startswith('SELECT') and random.random() < EXPLAIN_SAMPLE_RATE:
+            if explain_slots.acquire(blocking=False):
+                explain_pool.submit(explain, engine, statement, parameters, entry)
+            else:
+                entry['plan_error'] = 'Skipped: explain workers busy'
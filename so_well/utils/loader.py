@@ -1,29 +1,54 @@
 # so_well/utils/loader.py
-import csv
+import argparse
 from datetime import datetime
+from sqlalchemy import insert
 from sqlalchemy.exc import SQLAlchemyError
 from so_well.models import Address, Locality, Voter, db
 from .logging import logger
-from .validator import preprocess_csv  # Import the validator module
+from .validator import preprocess_csv, stream_rows, is_compressed  # Import the validator module
+from .bulk import bulk_load
+from .cache import LoaderCache
+from .delta import delta_load
+from .parallel import parallel_load
+from .checkpoint import LoadRun
+from .metrics import LoadMetrics
+from .normalize import normalize_batch
+from .deferral import defer_indexes, restore_indexes
+from .facets import refresh_facets
+from .refresh import refresh_lookup
 
 BATCH_SIZE = 1000  # Adjust batch size to optimize performance
 
-def insert_address(row, session):
-    existing_address = session.query(Address).filter_by(
-        house_number=row['HOUSE_NUMBER'],
-        house_number_suffix=row['HOUSENUMBERSUFFIX'],
-        street_name=row['STREET_NAME'],
-        street_type=row['STREETTYPECODENAME'],
-        direction=row['DIRECTION'],
-        post_direction=row['POST_DIRECTION'],
-        apt_num=row['APT_NUM'],
-        city=row['CITY'],
-        state=row['STATE'],
-        zip=row['ZIP']
-    ).first()
-
-    if existing_address:
-        return existing_address.id
+# Loader modes: 'copy' streams through COPY staging tables, 'parallel' stages byte-range chunks
+# in a process pool, 'delta' applies only changed rows, 'batch' is the row-by-row ORM fallback
+LOAD_MODES = ('copy', 'parallel', 'delta', 'batch')
+DEFAULT_LOAD_MODE = 'copy'
+# Modes that commit in source order and can resume from a checkpointed byte offset
+RESUMABLE_MODES = ('copy', 'batch')
+
+def insert_address(row, session, cache=None):
+    # A pre-warmed cache already holds every existing key, so a miss goes straight to insert
+    if cache is not None:
+        key = cache.addresses.row_key(row)
+        address_id = cache.addresses.get(key)
+        if address_id:
+            return address_id
+    else:
+        existing_address = session.query(Address).filter_by(
+            house_number=row['HOUSE_NUMBER'],
+            house_number_suffix=row['HOUSENUMBERSUFFIX'],
+            street_name=row['STREET_NAME'],
+            street_type=row['STREETTYPECODENAME'],
+            direction=row['DIRECTION'],
+            post_direction=row['POST_DIRECTION'],
+            apt_num=row['APT_NUM'],
+            city=row['CITY'],
+            state=row['STATE'],
+            zip=row['ZIP']
+        ).first()
+
+        if existing_address:
+            return existing_address.id
 
     try:
         address = Address(
@@ -40,24 +65,33 @@ def insert_address(row, session):
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
-        session.add(address)
-        session.flush()
+        # A savepoint, so a bad row undoes only its own insert and not the rest of the batch
+        with session.begin_nested():
+            session.add(address)
+            session.flush()
+        if cache is not None:
+            cache.addresses.add(key, address.id)
         return address.id
     except SQLAlchemyError as e:
-        session.rollback()
         logger.error(f"Error inserting address: {str(e)}")
         return None
 
-def insert_locality(row, session):
-    existing_locality = session.query(Locality).filter_by(
-        locality_code=row['LOCALITY_CODE'],
-        locality_name=row['LOCALITYNAME'],
-        precinct_code=row['PRECINCT_CODE_VALUE'],
-        precinct_name=row['PRECINCTNAME']
-    ).first()
+def insert_locality(row, session, cache=None):
+    if cache is not None:
+        key = cache.localities.row_key(row)
+        locality_id = cache.localities.get(key)
+        if locality_id:
+            return locality_id
+    else:
+        existing_locality = session.query(Locality).filter_by(
+            locality_code=row['LOCALITY_CODE'],
+            locality_name=row['LOCALITYNAME'],
+            precinct_code=row['PRECINCT_CODE_VALUE'],
+            precinct_name=row['PRECINCTNAME']
+        ).first()
 
-    if existing_locality:
-        return existing_locality.id
+        if existing_locality:
+            return existing_locality.id
 
     try:
         locality = Locality(
@@ -68,120 +102,247 @@ def insert_locality(row, session):
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
-        session.add(locality)
-        session.flush()
+        # Savepoint, as in insert_address
+        with session.begin_nested():
+            session.add(locality)
+            session.flush()
+        if cache is not None:
+            cache.localities.add(key, locality.id)
         return locality.id
     except SQLAlchemyError as e:
-        session.rollback()
         logger.error(f"Error inserting locality: {str(e)}")
         return None
 
-def insert_voter(row, residence_address_id, mailing_address_id, locality_id, session):
-    existing_voter = session.query(Voter).filter_by(
-        identification_number=row['IDENTIFICATION_NUMBER']
-    ).first()
+def voter_values(row, residence_address_id, mailing_address_id, locality_id):
+    """Column values for one voter from a normalized row, for a bulk insert."""
+    return {
+        'identification_number': row['IDENTIFICATION_NUMBER'],
+        'last_name': row['LAST_NAME'],
+        'first_name': row['FIRST_NAME'],
+        'middle_name': row['MIDDLE_NAME'],
+        'suffix': row['SUFFIX'],
+        'gender': row['GENDER'],
+        'dob': row['DOB'],
+        'registration_date': row['REGISTRATION_DATE'],
+        'effective_date': row['EFFECTIVE_DATE'],
+        'status': row['STATUS'],
+        'residence_address_id': residence_address_id,
+        'mailing_address_id': mailing_address_id,
+        'locality_id': locality_id,
+        'created_at': datetime.utcnow(),
+        'updated_at': datetime.utcnow()
+    }
+
+def existing_voter_ids(rows, session):
+    """Returns which identification numbers in the batch are already loaded, in one SELECT."""
+    ids = [row['IDENTIFICATION_NUMBER'] for row in rows if row.get('IDENTIFICATION_NUMBER')]
+    if not ids:
+        return set()
+    existing = session.query(Voter.identification_number).filter(Voter.identification_number.in_(ids))
+    return {identification_number for (identification_number,) in existing}
+
+def load_data(file_path='data/Registered_Voter_List.csv', mode=DEFAULT_LOAD_MODE, workers=None, resume=False, metrics_file=None, bulk=False, allow_mass_removal=False):
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Unknown load mode '{mode}', expected one of {LOAD_MODES}")
+    if resume and mode not in RESUMABLE_MODES:
+        raise ValueError(f"Load mode '{mode}' cannot resume, expected one of {RESUMABLE_MODES}")
 
-    if existing_voter:
-        return
+    logger.info(f"Loading data in {mode} mode...")
 
+    # Bulk loads drop secondary indexes and disable triggers for the duration
+    if bulk:
+        defer_indexes()
     try:
-        voter = Voter(
-            identification_number=row['IDENTIFICATION_NUMBER'],
-            last_name=row['LAST_NAME'],
-            first_name=row['FIRST_NAME'],
-            middle_name=row['MIDDLE_NAME'],
-            suffix=row['SUFFIX'],
-            gender=row['GENDER'],
-            dob=datetime.strptime(row['DOB'], '%m/%d/%Y') if row['DOB'] else None,
-            registration_date=datetime.strptime(row['REGISTRATION_DATE'], '%m/%d/%Y') if row['REGISTRATION_DATE'] else None,
-            effective_date=datetime.strptime(row['EFFECTIVE_DATE'], '%m/%d/%Y') if row['EFFECTIVE_DATE'] else None,
-            status=row['STATUS'],
-            residence_address_id=residence_address_id,
-            mailing_address_id=mailing_address_id,
-            locality_id=locality_id,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
-        )
-        session.add(voter)
-    except SQLAlchemyError as e:
-        session.rollback()
-        logger.error(f"Error inserting voter: {str(e)}")
+        metrics = run_load(file_path, mode, workers, resume, allow_mass_removal)
+    finally:
+        if bulk:
+            restore_indexes()
 
-def load_data(file_path='data/Registered_Voter_List.csv'):
-    logger.info("Loading data...")
+    # Search facets are precomputed per load; bumping the data version invalidates cached copies
+    try:
+        with metrics.stage('facets'):
+            refresh_facets()
+    except Exception as e:
+        logger.error(f"Error refreshing address facets: {str(e)}")
 
-    # Preprocess the CSV file
-    processed_file_path = 'data/Processed_Voter_List.csv'
-    preprocess_csv(file_path, processed_file_path)
+    # Searches read voter_lookup; it is refreshed concurrently so they never wait on it.
+    # A refresh already running may predate this load, so wait for it and refresh again.
+    try:
+        with metrics.stage('lookup_refresh'):
+            refresh_lookup(reason='load', wait=True)
+    except Exception as e:
+        logger.error(f"Error refreshing voter_lookup: {str(e)}")
+
+    metrics.write_summary(metrics_file)
+
+def run_load(file_path, mode, workers=None, resume=False, allow_mass_removal=False):
+    """Runs one load in the given mode and returns its metrics."""
+    if mode == 'parallel':
+        # Workers split the file by byte offset, so compressed input is expanded once first
+        if is_compressed(file_path):
+            processed_file_path = 'data/Processed_Voter_List.csv'
+            preprocess_csv(file_path, processed_file_path)
+            file_path = processed_file_path
+        metrics = LoadMetrics(mode)
+        load_data_parallel(file_path, workers, metrics)
+    elif mode == 'delta':
+        # Cleaned rows stream straight from the source file into the loader
+        rows = stream_rows(file_path)
+        metrics = LoadMetrics(mode, rows)
+        load_data_delta(rows, metrics, allow_mass_removal)
+    else:
+        run = LoadRun(file_path, mode)
+        run.start(resume)
+        rows = stream_rows(file_path, run.byte_offset, run.row_number)
+        metrics = LoadMetrics(mode, rows)
+
+        def checkpoint(execute):
+            run.checkpoint(execute, rows.row_number, rows.offset)
+
+        if mode == 'copy':
+            loaded = load_data_copy(rows, checkpoint, metrics)
+        else:
+            loaded = load_data_batch(rows, checkpoint, metrics)
+        run.finish('Complete' if loaded else 'Failed')
+
+    return metrics
+
+def load_data_copy(rows, checkpoint=None, metrics=None):
+    try:
+        totals = bulk_load(rows, checkpoint=checkpoint, metrics=metrics)
+        logger.info(f"Data loaded successfully - Rows: {totals['rows']}, Inserted Addresses: {totals['addresses']}, Inserted Localities: {totals['localities']}, Inserted Voters: {totals['voters']}")
+        return True
+    except Exception as e:
+        logger.error(f"Error loading data: {str(e)}")
+        return False
+
+def load_data_parallel(file_path, workers=None, metrics=None):
+    metrics = metrics or LoadMetrics('parallel')
+    try:
+        with metrics.stage('load'):
+            totals = parallel_load(file_path, workers)
+        metrics.batch_done(totals['rows'])
+        for name in ('invalid', 'localities', 'addresses', 'voters'):
+            metrics.count(name, totals[name])
+        logger.info(f"Data loaded successfully - Rows: {totals['rows']}, Inserted Addresses: {totals['addresses']}, Inserted Localities: {totals['localities']}, Inserted Voters: {totals['voters']}")
+        if totals['invalid'] > 0:
+            logger.error(f"Invalid Rows: {totals['invalid']}")
+    except Exception as e:
+        logger.error(f"Error loading data: {str(e)}")
 
-    inserted_addresses = 0
-    inserted_localities = 0
-    inserted_voters = 0
-    skipped_addresses = 0
-    skipped_localities = 0
-    skipped_voters = 0
-    errors = 0
+def load_data_delta(rows, metrics=None, allow_mass_removal=False):
+    metrics = metrics or LoadMetrics('delta')
+    try:
+        with metrics.stage('load'):
+            counts = delta_load(metrics.timed_rows(rows), allow_mass_removal)
+        metrics.batch_done(counts['rows'])
+        for name in ('inserted', 'updated', 'unchanged', 'removed', 'flagged_removed', 'localities', 'addresses'):
+            metrics.count(name, counts[name])
+        logger.info(f"Delta applied - Rows: {counts['rows']}, Inserted Voters: {counts['inserted']}, Updated Voters: {counts['updated']}, Unchanged Voters: {counts['unchanged']}, Removed Voters: {counts['removed']}, Flagged Removed: {counts['flagged_removed']}")
+        logger.info(f"Inserted Addresses: {counts['addresses']}, Inserted Localities: {counts['localities']}")
+    except Exception as e:
+        logger.error(f"Error loading data: {str(e)}")
+
+def load_data_batch(rows, checkpoint=None, metrics=None):
+    metrics = metrics or LoadMetrics('batch')
 
     try:
-        with open(processed_file_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            # Print column names for debugging
-            logger.info(f"CSV Columns: {reader.fieldnames}")
+        # Resolve address and locality ids in memory instead of one SELECT per row
+        cache = LoaderCache()
+        with metrics.stage('prewarm'):
+            cache.prewarm(db.session())
 
+        with metrics.track_engine(db.engine):
             batch_records = []
-            for i, row in enumerate(reader, start=1):
+            for i, row in enumerate(metrics.timed_rows(rows), start=1):
                 batch_records.append(row)
 
                 if i % BATCH_SIZE == 0:
-                    process_batch(batch_records, inserted_addresses, inserted_localities, inserted_voters, skipped_addresses, skipped_localities, skipped_voters, errors)
+                    process_batch(batch_records, metrics, cache, checkpoint)
                     batch_records = []  # Reset batch
 
             # Process remaining records
             if batch_records:
-                process_batch(batch_records, inserted_addresses, inserted_localities, inserted_voters, skipped_addresses, skipped_localities, skipped_voters, errors)
+                process_batch(batch_records, metrics, cache, checkpoint)
 
-            logger.info(f"Data loaded successfully - Inserted Addresses: {inserted_addresses}, Inserted Localities: {inserted_localities}, Inserted Voters: {inserted_voters}")
-            logger.info(f"Skipped Addresses: {skipped_addresses}, Skipped Localities: {skipped_localities}, Skipped Voters: {skipped_voters}")
-            if errors > 0:
-                logger.error(f"Total Errors: {errors}")
+        counters = metrics.counters
+        logger.info(f"Data loaded successfully - Inserted Addresses: {counters['inserted_addresses']}, Inserted Localities: {counters['inserted_localities']}, Inserted Voters: {counters['inserted_voters']}")
+        logger.info(f"Skipped Addresses: {counters['skipped_addresses']}, Skipped Localities: {counters['skipped_localities']}, Skipped Voters: {counters['skipped_voters']}")
+        if counters['errors'] > 0:
+            logger.error(f"Total Errors: {counters['errors']}")
+        return True
     except Exception as e:
         logger.error(f"Error loading data: {str(e)}")
+        return False
 
-def process_batch(batch_records, inserted_addresses, inserted_localities, inserted_voters, skipped_addresses, skipped_localities, skipped_voters, errors):
+def process_batch(batch_records, metrics, cache=None, checkpoint=None):
     session = db.session()
     try:
+        with metrics.stage('normalize'):
+            batch_records = normalize_batch(batch_records)
+
+        with metrics.stage('lookup'):
+            seen_voters = existing_voter_ids(batch_records, session)
+
+        voters = []
         for row in batch_records:
             try:
-                residence_address_id = insert_address(row, session)
-                if residence_address_id:
-                    inserted_addresses += 1
-                else:
-                    skipped_addresses += 1
-
-                mailing_address_id = insert_address(row, session) if row['MAILING_ADDRESS_LINE_1'] else None
+                # Lookup time includes inserting addresses and localities on a cache miss
+                with metrics.stage('lookup'):
+                    residence_address_id = insert_address(row, session, cache)
+                    locality_id = insert_locality(row, session, cache)
 
-                locality_id = insert_locality(row, session)
-                if locality_id:
-                    inserted_localities += 1
-                else:
-                    skipped_localities += 1
+                metrics.count('inserted_addresses' if residence_address_id else 'skipped_addresses')
+                metrics.count('inserted_localities' if locality_id else 'skipped_localities')
 
-                if residence_address_id and locality_id:
-                    insert_voter(row, residence_address_id, mailing_address_id, locality_id, session)
-                    inserted_voters += 1
+                if residence_address_id and locality_id and row['IDENTIFICATION_NUMBER'] not in seen_voters:
+                    # No mailing address: the file has only its first line, as in bulk.RESOLVE_VOTERS_SQL
+                    voters.append(voter_values(row, residence_address_id, None, locality_id))
+                    seen_voters.add(row['IDENTIFICATION_NUMBER'])
                 else:
-                    skipped_voters += 1
+                    metrics.count('skipped_voters')
             except KeyError as e:
-                errors += 1
+                metrics.count('errors')
                 logger.error(f"Error processing row {row}: Missing column {e}")
 
-        session.commit()
-        logger.info(f"Processed batch - Inserted Addresses: {inserted_addresses}, Inserted Localities: {inserted_localities}, Inserted Voters: {inserted_voters}")
+        # One multi-row insert per batch instead of an ORM object per voter
+        if voters:
+            with metrics.stage('insert'):
+                session.execute(insert(Voter), voters)
+
+        if checkpoint:
+            checkpoint(session.connection().exec_driver_sql)
+        with metrics.stage('commit'):
+            session.commit()
+        if cache is not None:
+            cache.commit()
+        metrics.count('inserted_voters', len(voters))
+        logger.info(f"Processed batch - Inserted Addresses: {metrics.counters['inserted_addresses']}, Inserted Localities: {metrics.counters['inserted_localities']}, Inserted Voters: {metrics.counters['inserted_voters']}")
     except Exception as e:
         session.rollback()
+        if cache is not None:
+            cache.rollback()
+        metrics.count('failed_batches')
         logger.error(f"Error processing batch: {str(e)}")
+        # Stop before a later batch can checkpoint past this one, so --resume retries it
+        raise
     finally:
         session.close()
+        metrics.batch_done(len(batch_records))
 
 if __name__ == "__main__":
-    load_data()
+    from so_well import begin_era
+
+    parser = argparse.ArgumentParser(description="Load the statewide voter file.")
+    parser.add_argument('file_path', nargs='?', default='data/Registered_Voter_List.csv')
+    parser.add_argument('--mode', choices=LOAD_MODES, default=DEFAULT_LOAD_MODE)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes for parallel mode (default: CPU count)")
+    parser.add_argument('--resume', action='store_true', help="Continue the last unfinished run of this file from its last committed batch")
+    parser.add_argument('--bulk', action='store_true', help="Drop secondary indexes and disable triggers during the load, then rebuild them and refresh voter_lookup once")
+    parser.add_argument('--allow-mass-removal', action='store_true', help="Let a delta load remove more than 5%% of voters (default: abort)")
+    parser.add_argument('--metrics-file', default=None, help="Where to write the JSON load summary (default: logs/load-metrics-<timestamp>.json)")
+    args = parser.parse_args()
+
+    app = begin_era()
+    with app.app_context():
+        load_data(args.file_path, mode=args.mode, workers=args.workers, resume=args.resume, metrics_file=args.metrics_file, bulk=args.bulk, allow_mass_removal=args.allow_mass_removal)
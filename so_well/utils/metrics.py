@@ -0,0 +1,137 @@
+# so_well/utils/metrics.py
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from sqlalchemy import event
+from .logging import logger
+from .validator import is_compressed
+
+REPORT_INTERVAL = 30  # Seconds between progress reports
+METRICS_DIR = 'logs'
+
+
+class LoadMetrics:
+    """
+    Throughput instrumentation for one loader run: row and outcome counters,
+    per-stage timings, DB round-trips per batch, rows/sec and ETA. Progress is
+    logged every REPORT_INTERVAL seconds and a JSON summary is written at the end.
+    """
+
+    def __init__(self, mode, source=None, report_interval=REPORT_INTERVAL):
+        self.mode = mode
+        self.source = source
+        self.report_interval = report_interval
+        # ETA follows byte progress, which is only comparable to the size of a plain file
+        self.total_bytes = None
+        if source is not None and not is_compressed(source.input_file):
+            self.total_bytes = os.path.getsize(source.input_file)
+        self.start_offset = source.offset if source is not None else 0
+        self.counters = defaultdict(int)
+        self.stages = defaultdict(float)
+        self.rows = 0
+        self.batches = 0
+        self.round_trips = 0
+        self.batch_round_trips = []
+        self._batch_start_round_trips = 0
+        self.started = time.perf_counter()
+        self.last_report = self.started
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def round_trip(self, amount=1):
+        self.round_trips += amount
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def timed_rows(self, rows, stage='parse'):
+        """Wraps a row iterator, charging the time spent producing each row to `stage`."""
+        iterator = iter(rows)
+        while True:
+            start = time.perf_counter()
+            row = next(iterator, None)
+            self.stages[stage] += time.perf_counter() - start
+            if row is None:
+                return
+            yield row
+
+    @contextmanager
+    def track_engine(self, engine):
+        """Counts every statement SQLAlchemy sends through `engine` as a round-trip."""
+        def before_cursor_execute(*args):
+            self.round_trips += 1
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    def batch_done(self, rows):
+        self.rows += rows
+        self.batches += 1
+        self.batch_round_trips.append(self.round_trips - self._batch_start_round_trips)
+        self._batch_start_round_trips = self.round_trips
+        if time.perf_counter() - self.last_report >= self.report_interval:
+            self.report()
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def rows_per_second(self):
+        elapsed = self.elapsed()
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    def eta_seconds(self):
+        """Remaining time from byte progress through the source, when its size is known."""
+        if not self.total_bytes:
+            return None
+        done = self.source.offset - self.start_offset
+        if done <= 0:
+            return None
+        remaining = max(self.total_bytes - self.source.offset, 0)
+        return remaining * self.elapsed() / done
+
+    def report(self):
+        self.last_report = time.perf_counter()
+        eta = self.eta_seconds()
+        per_batch = self.round_trips / self.batches if self.batches else 0
+        stages = ', '.join(f"{name}={seconds:.1f}s" for name, seconds in self.stages.items())
+        logger.info(
+            f"Load progress - Rows: {self.rows}, Rows/sec: {self.rows_per_second():.0f}, "
+            f"Round-trips/batch: {per_batch:.1f}, ETA: {f'{eta:.0f}s' if eta is not None else 'unknown'}, Stages: {stages}"
+        )
+
+    def summary(self):
+        return {
+            'mode': self.mode,
+            'rows': self.rows,
+            'batches': self.batches,
+            'elapsed_seconds': round(self.elapsed(), 3),
+            'rows_per_second': round(self.rows_per_second(), 1),
+            'round_trips': self.round_trips,
+            'round_trips_per_batch': round(self.round_trips / self.batches, 2) if self.batches else 0,
+            'max_round_trips_per_batch': max(self.batch_round_trips, default=0),
+            'stages': {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            'counters': dict(self.counters)
+        }
+
+    def write_summary(self, path=None):
+        """Logs the summary and writes it as JSON; returns the path written."""
+        if path is None:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            path = os.path.join(METRICS_DIR, f"load-metrics-{time.strftime('%Y-%m-%d-%H%M%S')}.json")
+        summary = self.summary()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"Load summary - {json.dumps(summary)}")
+        logger.info(f"Load metrics written to {path}")
+        return path
@@ -0,0 +1,56 @@
+# so_well/utils/normalize.py
+from datetime import datetime
+from functools import lru_cache
+from .logging import logger
+
+DATE_FORMAT = '%m/%d/%Y'
+DATE_FIELDS = ('DOB', 'REGISTRATION_DATE', 'EFFECTIVE_DATE')
+
+# Trimmed and upper-cased before they reach the database, so natural keys match across loads
+NAME_FIELDS = ('LAST_NAME', 'FIRST_NAME', 'MIDDLE_NAME', 'SUFFIX')
+ADDRESS_FIELDS = (
+    'HOUSE_NUMBER', 'HOUSENUMBERSUFFIX', 'STREET_NAME', 'STREETTYPECODENAME', 'DIRECTION',
+    'POST_DIRECTION', 'APT_NUM', 'CITY', 'STATE', 'ZIP'
+)
+TEXT_FIELDS = NAME_FIELDS + ADDRESS_FIELDS
+
+@lru_cache(maxsize=65536)
+def parse_date(value):
+    """
+    Parses a voter file date. Voter dates repeat heavily, so each distinct string
+    is parsed once. Unparseable dates are logged once and loaded as NULL.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, DATE_FORMAT).date()
+    except ValueError:
+        logger.warning(f"Unparseable date '{value}', loading as NULL")
+        return None
+
+def clean_date(value):
+    """Date text for the COPY-based modes: kept as is when it parses, '' (NULL) when not."""
+    return value if parse_date(value) is not None else ''
+
+def clean_text(value):
+    return value.strip().upper() if value else value
+
+def normalize_batch(rows):
+    """
+    Normalizes a batch of row dicts column by column: name and address fields are
+    trimmed and upper-cased and date fields are parsed to dates. Returns new row dicts.
+    """
+    if not rows:
+        return []
+
+    fields = list(rows[0].keys())
+    columns = {field: [row.get(field) for row in rows] for field in fields}
+
+    for field in TEXT_FIELDS:
+        if field in columns:
+            columns[field] = [clean_text(value) for value in columns[field]]
+    for field in DATE_FIELDS:
+        if field in columns:
+            columns[field] = [parse_date(value) for value in columns[field]]
+
+    return [dict(zip(fields, values)) for values in zip(*columns.values())]
@@ -0,0 +1,175 @@
+# so_well/utils/parallel.py
+import csv
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+import psycopg2
+from so_well.models import db
+from .bulk import SOURCE_COLUMNS, CsvStream, RESOLVE_LOCALITIES_SQL, RESOLVE_ADDRESSES_SQL, RESOLVE_VOTERS_SQL, VOTER_SKIP_EXISTING
+from .logging import logger
+
+CHUNKS_PER_WORKER = 4  # More chunks than workers keeps the pool busy when chunks finish unevenly
+
+# Shared by every worker connection, so it cannot be a temp table; each load gets its
+# own, suffixed with a run id, so concurrent parallel loads never touch each other's rows
+PARALLEL_STAGING_TABLE = 'meta.voter_load_staging_{run_id}'
+CHUNK_COLUMN = 'CHUNK_ID'
+
+CREATE_PARALLEL_STAGING_SQL = f"""
+    CREATE UNLOGGED TABLE {{table}} (
+        chunk_id integer NOT NULL,
+        {', '.join(f'{column.lower()} text' for column in SOURCE_COLUMNS)}
+    );
+"""
+
+PARALLEL_COPY_SQL = f"""
+    COPY {{table}} (chunk_id, {', '.join(column.lower() for column in SOURCE_COLUMNS)})
+    FROM STDIN WITH (FORMAT csv, NULL '\\N')
+"""
+
+
+def split_ranges(file_path, chunks):
+    """
+    Splits a CSV file into byte ranges that start and end on line boundaries.
+    Returns the header fields and a list of (start, end) offsets. Quoted fields
+    with embedded newlines are not supported; the voter file has none.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        fieldnames = next(csv.reader([header.decode('utf-8', errors='replace')]))
+        data_start = f.tell()
+
+        step = max((size - data_start) // chunks, 1)
+        boundaries = [data_start]
+        for i in range(1, chunks):
+            f.seek(data_start + i * step)
+            f.readline()  # Move to the start of the next full line
+            position = f.tell()
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+        boundaries.append(size)
+
+    return fieldnames, list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def read_range(file_path, start, end):
+    """Yields decoded lines from the byte range [start, end)."""
+    position = start
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode('utf-8', errors='replace').replace('\0', '')
+
+
+def validate_row(row):
+    """
+    Returns True when a row has an id and every loaded column. Unparseable dates
+    are blanked by CsvStream and load as NULL, as in every other mode.
+    """
+    if not row.get('IDENTIFICATION_NUMBER'):
+        return False
+    return all(row.get(column) is not None for column in SOURCE_COLUMNS)
+
+
+def stage_chunk(dsn, table, file_path, fieldnames, chunk_id, start, end):
+    """
+    Worker: parses and validates one byte range and COPYs the valid rows into the
+    run's staging table on its own connection, committing independently.
+    """
+    counts = {'chunk': chunk_id, 'rows': 0, 'invalid': 0}
+
+    def valid_rows():
+        for row in csv.DictReader(read_range(file_path, start, end), fieldnames=fieldnames):
+            counts['rows'] += 1
+            if validate_row(row):
+                row[CHUNK_COLUMN] = str(chunk_id)
+                yield row
+            else:
+                counts['invalid'] += 1
+
+    connection = psycopg2.connect(dsn)
+    try:
+        with connection.cursor() as cursor:
+            cursor.copy_expert(PARALLEL_COPY_SQL.format(table=table), CsvStream(valid_rows(), [CHUNK_COLUMN] + SOURCE_COLUMNS))
+        connection.commit()
+        return counts
+    finally:
+        connection.close()
+
+
+def insert_chunk_voters(dsn, table, chunk_id):
+    """Worker: inserts the voters of one staged chunk once addresses and localities are reconciled."""
+    source = f"(SELECT * FROM {table} WHERE chunk_id = {int(chunk_id)})"
+    connection = psycopg2.connect(dsn)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(RESOLVE_VOTERS_SQL.format(source=source, on_conflict=VOTER_SKIP_EXISTING))
+            inserted = cursor.rowcount
+        connection.commit()
+        return inserted
+    finally:
+        connection.close()
+
+
+def parallel_load(file_path, workers=None):
+    """
+    Loads a voter file with a process pool. Chunks are staged in parallel, then
+    addresses and localities are reconciled once across all chunks so rows that
+    share a key in different chunks resolve to the same id, and finally each
+    chunk's voters are inserted in parallel. Returns totals for the run.
+    """
+    workers = workers or os.cpu_count() or 1
+    dsn = db.engine.url.set(drivername='postgresql').render_as_string(hide_password=False)
+    fieldnames, ranges = split_ranges(file_path, workers * CHUNKS_PER_WORKER)
+    logger.info(f"Parallel load of {file_path} in {len(ranges)} chunks across {workers} workers")
+
+    # Forked workers must not inherit pooled connections
+    db.engine.dispose()
+
+    table = PARALLEL_STAGING_TABLE.format(run_id=uuid.uuid4().hex[:12])
+    totals = {'rows': 0, 'invalid': 0, 'localities': 0, 'addresses': 0, 'voters': 0}
+    connection = psycopg2.connect(dsn)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_PARALLEL_STAGING_SQL.format(table=table))
+        connection.commit()
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            staged = [pool.submit(stage_chunk, dsn, table, file_path, fieldnames, chunk_id, start, end)
+                      for chunk_id, (start, end) in enumerate(ranges)]
+            for future in staged:
+                counts = future.result()
+                totals['rows'] += counts['rows']
+                totals['invalid'] += counts['invalid']
+                logger.info(f"Staged chunk {counts['chunk']} - Rows: {counts['rows']}, Invalid: {counts['invalid']}")
+
+            # Reconciliation: one set-based pass across every chunk
+            with connection.cursor() as cursor:
+                cursor.execute(f"CREATE INDEX ON {table} (chunk_id); ANALYZE {table};")
+                cursor.execute(RESOLVE_LOCALITIES_SQL.format(source=table))
+                totals['localities'] = cursor.rowcount
+                cursor.execute(RESOLVE_ADDRESSES_SQL.format(source=table))
+                totals['addresses'] = cursor.rowcount
+            connection.commit()
+            logger.info(f"Reconciled chunks - Inserted Localities: {totals['localities']}, Inserted Addresses: {totals['addresses']}")
+
+            for inserted in pool.map(insert_chunk_voters, [dsn] * len(ranges), [table] * len(ranges), range(len(ranges))):
+                totals['voters'] += inserted
+
+        return totals
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        # Only this run's table, whether the load finished or not
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {table};")
+        connection.commit()
+        connection.close()
@@ -0,0 +1,150 @@
+# so_well/utils/refresh.py
+import argparse
+import time
+from sqlalchemy import text
+from so_well.models import db
+from .logging import logger
+
+LOOKUP_REFRESH_LOCK = 72910417  # Advisory lock held while voter_lookup refreshes, across processes
+REFRESH_DEBOUNCE = 30  # Seconds a pending request waits so overlapping requests share one refresh
+REFRESH_SCHEDULE = 3600  # Seconds between scheduled refreshes in watch mode
+REFRESH_POLL = 5  # Seconds between pending request checks in watch mode
+
+# A request while another is still pending is folded into it
+REQUEST_REFRESH_SQL = text("""
+    INSERT INTO meta.lookup_refresh (reason, status)
+    SELECT :reason, 'Pending'
+    WHERE NOT EXISTS (SELECT 1 FROM meta.lookup_refresh WHERE status = 'Pending')
+    RETURNING id;
+""")
+
+REFRESH_DUE_SQL = text("""
+    SELECT min(requested_at) <= now() - make_interval(secs => :debounce)
+    FROM meta.lookup_refresh
+    WHERE status = 'Pending';
+""")
+
+CLAIM_REFRESH_SQL = text("""
+    UPDATE meta.lookup_refresh
+    SET status = 'Running', started_at = now()
+    WHERE status = 'Pending'
+    RETURNING id;
+""")
+
+FINISH_REFRESH_SQL = text("""
+    UPDATE meta.lookup_refresh
+    SET status = :status, finished_at = now(), duration_seconds = :duration, error = :error
+    WHERE id = ANY(:ids);
+""")
+
+# Refreshes left Running by a process that died; only cleared while holding the lock
+FAIL_ABANDONED_SQL = text("""
+    UPDATE meta.lookup_refresh
+    SET status = 'Failed', finished_at = now(), error = 'Abandoned'
+    WHERE status = 'Running';
+""")
+
+# Readers keep using the old contents until the new ones are swapped in
+REFRESH_CONCURRENTLY_SQL = text("REFRESH MATERIALIZED VIEW CONCURRENTLY electorate.voter_lookup;")
+
+FRESHNESS_SQL = text("""
+    SELECT
+        (SELECT row_to_json(r) FROM (
+            SELECT id, reason, started_at, finished_at, duration_seconds
+            FROM meta.lookup_refresh
+            WHERE status = 'Complete'
+            ORDER BY finished_at DESC
+            LIMIT 1
+        ) r) AS last_refresh,
+        (SELECT count(*) FROM meta.lookup_refresh WHERE status = 'Pending') AS pending,
+        (SELECT count(*) FROM meta.lookup_refresh WHERE status = 'Running') AS running;
+""")
+
+
+def request_refresh(reason='manual'):
+    """Asks for a voter_lookup refresh. Returns the request id, or None if one was already pending."""
+    with db.engine.begin() as connection:
+        request_id = connection.execute(REQUEST_REFRESH_SQL, {'reason': reason}).scalar()
+    if request_id is None:
+        logger.info(f"voter_lookup refresh ({reason}) folded into the pending request")
+    return request_id
+
+def refresh_lookup(reason=None, debounce=0, wait=False):
+    """
+    Runs one concurrent refresh of electorate.voter_lookup covering every pending
+    request, recording its duration and freshness in meta.lookup_refresh. `reason`
+    files a request first. Only one process refreshes at a time; others return
+    False straight away and their requests are left for the next one. With `wait`,
+    waits for the running refresh to finish and then serves the pending requests,
+    since a refresh that started before this caller's writes committed does not
+    include them. With `debounce`, waits until the oldest request is that old.
+    """
+    if reason:
+        request_refresh(reason)
+
+    with db.engine.connect() as connection:
+        connection.execution_options(isolation_level='AUTOCOMMIT')
+        if wait:
+            connection.execute(text("SELECT pg_advisory_lock(:key);"), {'key': LOOKUP_REFRESH_LOCK})
+        elif not connection.execute(text("SELECT pg_try_advisory_lock(:key);"), {'key': LOOKUP_REFRESH_LOCK}).scalar():
+            logger.info("voter_lookup refresh already running in another process")
+            return False
+
+        try:
+            connection.execute(FAIL_ABANDONED_SQL)
+            if debounce and not connection.execute(REFRESH_DUE_SQL, {'debounce': debounce}).scalar():
+                return False
+
+            ids = connection.execute(CLAIM_REFRESH_SQL).scalars().all()
+            if not ids:
+                return False
+
+            start = time.perf_counter()
+            status, error = 'Complete', None
+            try:
+                connection.execute(REFRESH_CONCURRENTLY_SQL)
+            except Exception as e:
+                status, error = 'Failed', str(e)
+                logger.error(f"Error refreshing voter_lookup: {str(e)}")
+            duration = time.perf_counter() - start
+
+            connection.execute(FINISH_REFRESH_SQL, {'status': status, 'duration': duration, 'error': error, 'ids': ids})
+            logger.info(f"voter_lookup refresh {status.lower()} in {duration:.1f}s for {len(ids)} request(s)")
+            return status == 'Complete'
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key);"), {'key': LOOKUP_REFRESH_LOCK})
+
+def lookup_freshness():
+    """The last completed refresh (voter_lookup is as of its started_at) and how many are queued."""
+    row = db.session.execute(FRESHNESS_SQL).mappings().first()
+    return {'last_refresh': row['last_refresh'], 'pending': row['pending'], 'running': row['running']}
+
+def watch(schedule=REFRESH_SCHEDULE, debounce=REFRESH_DEBOUNCE, poll=REFRESH_POLL):
+    """Refreshes on a schedule and serves pending requests once they are `debounce` seconds old."""
+    logger.info(f"Watching voter_lookup refresh requests (schedule {schedule}s, debounce {debounce}s)")
+    last_scheduled = time.monotonic()
+    while True:
+        if time.monotonic() - last_scheduled >= schedule:
+            request_refresh('schedule')
+            last_scheduled = time.monotonic()
+        try:
+            refresh_lookup(debounce=debounce)
+        except Exception as e:
+            logger.error(f"Error in voter_lookup refresh watch: {str(e)}")
+        time.sleep(poll)
+
+if __name__ == "__main__":
+    from so_well import begin_era
+
+    parser = argparse.ArgumentParser(description="Refresh the electorate.voter_lookup search view.")
+    parser.add_argument('--watch', action='store_true', help="Keep running, refreshing on a schedule and on request")
+    parser.add_argument('--schedule', type=int, default=REFRESH_SCHEDULE, help="Seconds between scheduled refreshes in watch mode")
+    parser.add_argument('--debounce', type=int, default=REFRESH_DEBOUNCE, help="Seconds to let requests pile up in watch mode")
+    args = parser.parse_args()
+
+    app = begin_era()
+    with app.app_context():
+        if args.watch:
+            watch(args.schedule, args.debounce)
+        else:
+            refresh_lookup(reason='manual')
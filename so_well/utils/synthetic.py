@@ -0,0 +1,143 @@
+# so_well/utils/synthetic.py
+import argparse
+import csv
+import gzip
+import os
+import random
+from datetime import date, timedelta
+from .bulk import SOURCE_COLUMNS
+from .logging import logger
+
+# Duplication ratios roughly matching the statewide file
+VOTERS_PER_ADDRESS = 1.9  # Registered voters sharing a residence address
+LOCALITY_COUNT = 133  # Counties and independent cities
+PRECINCTS_PER_LOCALITY = 19  # Distinct locality rows are localities x precincts
+STREETS_PER_LOCALITY = 400
+APARTMENT_RATE = 0.2  # Addresses with an APT_NUM
+MAILING_ADDRESS_RATE = 0.15  # Voters with MAILING_ADDRESS_LINE_1 set
+DUPLICATE_ROW_RATE = 0.001  # Rows repeating an earlier IDENTIFICATION_NUMBER
+INACTIVE_RATE = 0.1
+
+FIRST_NAMES = [
+    'JAMES', 'MARY', 'ROBERT', 'PATRICIA', 'JOHN', 'JENNIFER', 'MICHAEL', 'LINDA', 'DAVID', 'ELIZABETH',
+    'WILLIAM', 'BARBARA', 'RICHARD', 'SUSAN', 'JOSEPH', 'JESSICA', 'THOMAS', 'SARAH', 'CHARLES', 'KAREN',
+    'CHRISTOPHER', 'LISA', 'DANIEL', 'NANCY', 'MATTHEW', 'BETTY', 'ANTHONY', 'MARGARET', 'MARK', 'SANDRA',
+    'DONALD', 'ASHLEY', 'STEVEN', 'KIMBERLY', 'PAUL', 'EMILY', 'ANDREW', 'DONNA', 'JOSHUA', 'MICHELLE'
+]
+LAST_NAMES = [
+    'SMITH', 'JOHNSON', 'WILLIAMS', 'BROWN', 'JONES', 'GARCIA', 'MILLER', 'DAVIS', 'RODRIGUEZ', 'MARTINEZ',
+    'HERNANDEZ', 'LOPEZ', 'GONZALEZ', 'WILSON', 'ANDERSON', 'THOMAS', 'TAYLOR', 'MOORE', 'JACKSON', 'MARTIN',
+    'LEE', 'PEREZ', 'THOMPSON', 'WHITE', 'HARRIS', 'SANCHEZ', 'CLARK', 'RAMIREZ', 'LEWIS', 'ROBINSON',
+    'WALKER', 'YOUNG', 'ALLEN', 'KING', 'WRIGHT', 'SCOTT', 'TORRES', 'NGUYEN', 'HILL', 'FLORES'
+]
+SUFFIXES = ['JR', 'SR', 'II', 'III']
+STREET_NAMES = [
+    'MAIN', 'OAK', 'PINE', 'MAPLE', 'CEDAR', 'ELM', 'WASHINGTON', 'LAKE', 'HILL', 'JEFFERSON',
+    'RIVER', 'PARK', 'CHURCH', 'MILL', 'SPRING', 'FOREST', 'MADISON', 'RIDGE', 'MEADOW', 'LINCOLN'
+]
+STREET_TYPES = ['ST', 'AVE', 'RD', 'DR', 'LN', 'CT', 'WAY', 'PL', 'BLVD', 'CIR']
+DIRECTIONS = ['', '', '', '', 'N', 'S', 'E', 'W']
+
+SIZE_SUFFIXES = {'k': 1000, 'm': 1000000}
+
+
+def parse_size(value):
+    """Parses a row count like 10000, 10k or 8m."""
+    value = str(value).strip().lower()
+    if value and value[-1] in SIZE_SUFFIXES:
+        return int(float(value[:-1]) * SIZE_SUFFIXES[value[-1]])
+    return int(value)
+
+def synthetic_date(rng, start_year, end_year):
+    start = date(start_year, 1, 1)
+    return (start + timedelta(days=rng.randrange((date(end_year, 12, 31) - start).days))).strftime('%m/%d/%Y')
+
+def locality_fields(index):
+    """LOCALITY_CODE, LOCALITYNAME, PRECINCT_CODE_VALUE and PRECINCTNAME for a locality row."""
+    locality = index // PRECINCTS_PER_LOCALITY
+    precinct = index % PRECINCTS_PER_LOCALITY
+    return {
+        'LOCALITY_CODE': f"{locality * 2 + 1:03d}",
+        'LOCALITYNAME': f"LOCALITY {locality + 1:03d}",
+        'PRECINCT_CODE_VALUE': f"{precinct + 1:03d}",
+        'PRECINCTNAME': f"PRECINCT {precinct + 1:03d}"
+    }
+
+def address_fields(index):
+    """
+    Residence address fields derived from the address index alone, so every voter
+    assigned the same index shares exactly the same address and locality.
+    """
+    locality = index % (LOCALITY_COUNT * PRECINCTS_PER_LOCALITY)
+    street = (index // LOCALITY_COUNT) % STREETS_PER_LOCALITY
+    fields = {
+        'HOUSE_NUMBER': str(1 + (index * 7919) % 9999),
+        'HOUSENUMBERSUFFIX': '1/2' if index % 97 == 0 else '',
+        'STREET_NAME': f"{STREET_NAMES[street % len(STREET_NAMES)]} {street // len(STREET_NAMES) + 1}",
+        'STREETTYPECODENAME': STREET_TYPES[street % len(STREET_TYPES)],
+        'DIRECTION': DIRECTIONS[street % len(DIRECTIONS)],
+        'POST_DIRECTION': '',
+        'APT_NUM': str(index % 40 + 1) if (index * 31) % 100 < APARTMENT_RATE * 100 else '',
+        'CITY': f"CITY {locality // PRECINCTS_PER_LOCALITY + 1:03d}",
+        'STATE': 'VA',
+        'ZIP': f"{22000 + (locality // PRECINCTS_PER_LOCALITY) * 13 % 2000:05d}"
+    }
+    fields.update(locality_fields(locality))
+    return fields
+
+def synthetic_rows(rows, seed=0):
+    """Yields `rows` voter file rows as dicts with the columns the loader reads."""
+    rng = random.Random(seed)
+    address_count = max(int(rows / VOTERS_PER_ADDRESS), 1)
+    identification_number = 100000000
+
+    for _ in range(rows):
+        if identification_number > 100000000 and rng.random() < DUPLICATE_ROW_RATE:
+            voter_id = identification_number - rng.randrange(min(identification_number - 100000000, 1000))
+        else:
+            identification_number += 1
+            voter_id = identification_number
+
+        row = {
+            'IDENTIFICATION_NUMBER': str(voter_id),
+            'LAST_NAME': rng.choice(LAST_NAMES),
+            'FIRST_NAME': rng.choice(FIRST_NAMES),
+            'MIDDLE_NAME': rng.choice(FIRST_NAMES) if rng.random() < 0.8 else '',
+            'SUFFIX': rng.choice(SUFFIXES) if rng.random() < 0.05 else '',
+            'GENDER': rng.choice(('M', 'F', 'U')),
+            'DOB': synthetic_date(rng, 1930, 2006),
+            'REGISTRATION_DATE': synthetic_date(rng, 1970, 2024),
+            'EFFECTIVE_DATE': synthetic_date(rng, 2000, 2024),
+            'STATUS': 'Inactive' if rng.random() < INACTIVE_RATE else 'Active',
+            'MAILING_ADDRESS_LINE_1': ''
+        }
+        row.update(address_fields(rng.randrange(address_count)))
+        if rng.random() < MAILING_ADDRESS_RATE:
+            row['MAILING_ADDRESS_LINE_1'] = f"PO BOX {rng.randrange(1, 9999)}"
+        yield row
+
+def generate_voter_file(output_file, rows, seed=0):
+    """
+    Writes a synthetic voter file with `rows` rows in the loader's column set.
+    A .gz output path is written gzip-compressed. Returns the output path.
+    """
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    opener = gzip.open if output_file.lower().endswith('.gz') else open
+    with opener(output_file, 'wt', encoding='utf-8', newline='') as outfile:
+        writer = csv.DictWriter(outfile, fieldnames=SOURCE_COLUMNS)
+        writer.writeheader()
+        for row in synthetic_rows(rows, seed):
+            writer.writerow(row)
+
+    logger.info(f"Synthetic voter file with {rows} rows saved to {output_file}")
+    return output_file
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic statewide voter file.")
+    parser.add_argument('rows', help="Row count, e.g. 10k, 1m or 8m")
+    parser.add_argument('output_file', nargs='?', default=None, help="Default: data/benchmark/voters-<rows>-seed<seed>.csv")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    output_file = args.output_file or f"data/benchmark/voters-{args.rows.lower()}-seed{args.seed}.csv"
+    generate_voter_file(output_file, parse_size(args.rows), args.seed)
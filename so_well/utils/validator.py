@@ -1,15 +1,96 @@
 # so_well/utils/validator.py
 import csv
+import gzip
+import zipfile
+from contextlib import contextmanager
 from .logging import logger
 
+COMPRESSED_SUFFIXES = ('.gz', '.zip')
+
+def is_compressed(input_file):
+    return input_file.lower().endswith(COMPRESSED_SUFFIXES)
+
+@contextmanager
+def open_source(input_file):
+    """
+    Opens a plain, gzip or zip voter file as a binary stream. Compressed files are
+    decompressed as they are read; a zip archive is expected to hold one CSV.
+    Offsets into the stream are offsets into the uncompressed data.
+    """
+    if input_file.lower().endswith('.gz'):
+        with gzip.open(input_file, 'rb') as infile:
+            yield infile
+    elif input_file.lower().endswith('.zip'):
+        with zipfile.ZipFile(input_file) as archive:
+            members = [name for name in archive.namelist() if name.lower().endswith('.csv')]
+            if not members:
+                raise ValueError(f"No CSV file found in {input_file}")
+            with archive.open(members[0]) as member:
+                yield member
+    else:
+        with open(input_file, 'rb') as infile:
+            yield infile
+
+def clean_line(line):
+    """Decodes a raw line, replacing invalid characters and dropping NUL bytes."""
+    return line.decode('utf-8', errors='replace').replace('\0', '')
+
+class RowSource:
+    """
+    Iterates cleaned rows as dicts straight from the source file. Tracks the byte
+    offset just past the last row yielded and its row number, so a load can record
+    where it got to and later resume from that offset. Rows the CSV parser rejects
+    are logged and skipped; nothing is written to disk.
+    """
+
+    def __init__(self, input_file, offset=0, row_number=0):
+        self.input_file = input_file
+        self.offset = offset
+        self.row_number = row_number
+        self.fieldnames = None
+
+    def lines(self, infile):
+        for line in infile:
+            self.offset += len(line)
+            yield clean_line(line)
+
+    def __iter__(self):
+        with open_source(self.input_file) as infile:
+            header = infile.readline()
+            self.fieldnames = next(csv.reader([clean_line(header)]))
+            logger.info(f"CSV Columns: {self.fieldnames}")
+
+            if self.offset > len(header):
+                infile.seek(self.offset)
+                logger.info(f"Resuming {self.input_file} at byte {self.offset} after row {self.row_number}")
+            else:
+                self.offset = len(header)
+
+            reader = csv.DictReader(self.lines(infile), fieldnames=self.fieldnames)
+            while True:
+                try:
+                    row = next(reader)
+                except StopIteration:
+                    break
+                except csv.Error as e:
+                    logger.error(f"Error processing row {self.row_number + 1}: {str(e)}")
+                    continue
+                self.row_number += 1
+                yield row
+
+def stream_rows(input_file, offset=0, row_number=0):
+    """Returns a RowSource over the cleaned rows of a plain or compressed voter file."""
+    return RowSource(input_file, offset, row_number)
+
 def preprocess_csv(input_file, output_file):
     """
     Preprocesses the input CSV file to replace invalid characters and write to a new file.
-    Logs any problematic rows.
+    Logs any problematic rows. Only needed when a plain seekable copy is required,
+    such as for the parallel loader reading a compressed file.
     """
     try:
-        with open(input_file, 'r', encoding='utf-8', errors='replace') as infile, open(output_file, 'w', encoding='utf-8', newline='') as outfile:
-            reader = csv.reader(infile)
+        with open_source(input_file) as infile, open(output_file, 'w', encoding='utf-8', newline='') as outfile:
+            reader = csv.reader(clean_line(line) for line in infile)
             writer = csv.writer(outfile)
 
             for row_num, row in enumerate(reader, start=1):